@@ -0,0 +1,67 @@
+"""
+Compare two benchmark result files written by benchmarks/run.py.
+
+Usage:
+    python benchmarks/compare.py outputs/benchmarks/base.json outputs/benchmarks/new.json
+
+For every case present in both files, prints the best time of each run and
+the ratio new / base. Exits with status 1 when any case is slower than the
+threshold (default 1.10, i.e. 10% slower).
+"""
+
+import argparse
+import json
+import logging
+import sys
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("benchmarks")
+
+Case = Tuple[str, int, str]
+
+
+def load_results(path: str) -> Dict[Case, dict]:
+    """Read a results file into a dict keyed by (config, size, method)."""
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    return {(r["config"], r["size"], r["method"]): r for r in report["results"]}
+
+
+def compare(base: Dict[Case, dict], new: Dict[Case, dict]) -> List[Tuple[Case, float, float, float]]:
+    """Pair the cases of two runs.
+
+    Returns:
+        list: (case, base seconds, new seconds, new / base) for the shared cases.
+    """
+    rows = []
+    for case in sorted(base.keys() & new.keys()):
+        base_s, new_s = base[case]["min_s"], new[case]["min_s"]
+        rows.append((case, base_s, new_s, new_s / base_s))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=1.10)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    rows = compare(load_results(args.base), load_results(args.new))
+    regressions = 0
+    logger.info("%-22s %7s %-16s %10s %10s %7s", "config", "size", "method", "base s", "new s", "ratio")
+    for (config, size, method), base_s, new_s, ratio in rows:
+        flag = ""
+        if ratio > args.threshold:
+            flag = "  SLOWER"
+            regressions += 1
+        elif ratio < 1 / args.threshold:
+            flag = "  faster"
+        logger.info("%-22s %7d %-16s %10.4f %10.4f %7.2f%s", config, size, method, base_s, new_s, ratio, flag)
+    logger.info("%d of %d cases slower than %.2fx", regressions, len(rows), args.threshold)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
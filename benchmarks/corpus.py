@@ -0,0 +1,85 @@
+"""
+Synthetic Spanish social-media corpus for the preprocessing benchmarks.
+
+Texts are generated from a seeded random generator, so the same seed and
+sizes always produce the same corpus and results can be compared between
+commits.
+"""
+
+import random
+from typing import List
+
+WORDS = [
+    "hola", "que", "tal", "como", "estas", "hoy", "fuimos", "al", "parque", "con",
+    "los", "niños", "y", "la", "familia", "el", "gobierno", "anunció", "nuevas",
+    "medidas", "económicas", "para", "todas", "las", "regiones", "del", "país", "no",
+    "puedo", "creer", "que", "el", "partido", "terminara", "así", "mañana", "vamos",
+    "a", "la", "playa", "gracias", "por", "el", "apoyo", "esta", "noche", "celebramos",
+    "con", "amigos", "música", "comida", "todxs", "les", "chiques", "amigues",
+    "nosotres", "compañeres",
+]
+
+HASHTAGS = ["#SiSeñor", "#FelizViernes", "#chile2024", "#NoMasAbusos", "#yey", "#Fútbol"]
+URLS = ["https://t.co/AbC123xyz", "http://ejemplo.cl/noticia?id=42&ref=tw", "https://www.google.com"]
+EMOJIS = ["😀", "😂", "❤️", "🔥", "👍🏽", "🇨🇱", "🙏"]
+EMOTICONS = [":)", ":(", ";)", ":D", "XD", ":-P"]
+HTML = ["<b>", "</b>", "<br/>", '<a href="https://x.com">', "</a>", "<p>"]
+REDUPLICATIONS = ["holaaaa", "siiii", "noooo", "jajajaja", "buenísimooo", "graciaaas"]
+PUNCTUATION = [",", ".", "!", "?", "¡", "¿", "...", "!!!", "??"]
+NUMBERS = ["2024", "15", "3.500", "100%", "1º"]
+
+# (generator, weight) pairs used to pick every token after the first word
+_TOKEN_KINDS = (
+    (WORDS, 60),
+    (HASHTAGS, 5),
+    (URLS, 2),
+    (EMOJIS, 5),
+    (EMOTICONS, 3),
+    (HTML, 3),
+    (REDUPLICATIONS, 4),
+    (PUNCTUATION, 10),
+    (NUMBERS, 3),
+)
+
+
+def generate_text(rng: random.Random, size: int) -> str:
+    """Generate a text of about size characters.
+
+    Args:
+        rng (random.Random): Seeded generator.
+        size (int): Target length in characters.
+
+    Returns:
+        str: Text with words, hashtags, URLs, emojis, emoticons, HTML tags,
+        reduplications, punctuation, numbers, repeated words and breaklines.
+    """
+    pools = [pool for pool, _ in _TOKEN_KINDS]
+    weights = [weight for _, weight in _TOKEN_KINDS]
+    tokens = [rng.choice(WORDS).capitalize()]
+    length = len(tokens[0])
+    while length < size:
+        token = rng.choice(rng.choices(pools, weights)[0])
+        roll = rng.random()
+        if roll < 0.02:
+            # Spam: the same word several times
+            token = " ".join([token] * rng.randint(3, 6))
+        elif roll < 0.04:
+            token += "\n" * rng.randint(1, 3)
+        tokens.append(token)
+        length += len(token) + 1
+    return " ".join(tokens)[:size]
+
+
+def generate_corpus(n_texts: int, size: int, seed: int = 0) -> List[str]:
+    """Generate n_texts texts of about size characters each.
+
+    Args:
+        n_texts (int): Number of texts.
+        size (int): Target length of each text in characters.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        list: Generated texts.
+    """
+    rng = random.Random(f"{seed}-{size}")
+    return [generate_text(rng, size) for _ in range(n_texts)]
@@ -0,0 +1,194 @@
+"""
+Benchmark SpanishPreprocess over a matrix of option sets and text sizes.
+
+Usage:
+    python benchmarks/run.py --output outputs/benchmarks/current.json
+    python benchmarks/run.py --quick
+
+Each case transforms a synthetic corpus (see corpus.py) several times and
+records the best and median wall time. Results are written as JSON so that
+two runs can be compared with benchmarks/compare.py.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from typing import Callable, Dict, List, Optional
+
+from corpus import generate_corpus
+
+logger = logging.getLogger("benchmarks")
+
+# Option sets representative of how the preprocessor is configured in practice
+CONFIGS: Dict[str, dict] = {
+    "default": {},
+    "light": {
+        "split_hashtags": False,
+        "reduce_spam": False,
+        "remove_reduplications": False,
+        "remove_vowels_accents": False,
+        "remove_unprintable": False,
+        "remove_html_tags": False,
+    },
+    "keep_emojis": {"remove_emojis": False, "remove_emoticons": False},
+    "keep_emojis_protected": {
+        "remove_emojis": False,
+        "remove_emoticons": False,
+        "protect_spans": True,
+    },
+    "social": {
+        "split_hashtags": False,
+        "remove_hashtags": True,
+        "normalize_inclusive_language": True,
+        "normalize_fancy_letters": True,
+    },
+    "stopwords_stem": {"remove_stopwords": True, "stopwords_list": "extended", "stem": True},
+    "lemmatize": {"lemmatize": True},
+}
+
+# Text sizes in characters: a tweet, a short post, an article and a long document
+SIZES = [280, 2_000, 20_000, 100_000]
+
+METHODS = ("transform", "transform_batch", "transform_arrow")
+
+# Cases skipped because they take minutes without telling anything new
+_MAX_SIZE = {"lemmatize": 20_000}
+
+
+def _runner(preprocessor, method: str, texts: List[str]) -> Optional[Callable[[], object]]:
+    if method == "transform":
+        return lambda: [preprocessor.transform(text) for text in texts]
+    if method == "transform_batch":
+        return lambda: preprocessor.transform_batch(texts)
+    if method == "transform_arrow":
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return None
+        array = pa.array(texts)
+        return lambda: preprocessor.transform_arrow(array)
+    raise ValueError(f"Unknown method {method}")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+    configs: List[str],
+    sizes: List[int],
+    methods: List[str],
+    repeat: int = 3,
+    budget: int = 200_000,
+    seed: int = 0,
+) -> dict:
+    """Run every benchmark case.
+
+    Args:
+        configs (list): Names of CONFIGS to run.
+        sizes (list): Text sizes in characters.
+        methods (list): SpanishPreprocess methods to time.
+        repeat (int, optional): Timed repetitions of each case. Defaults to 3.
+        budget (int, optional): Characters transformed per repetition; the number of
+            texts of each size is budget // size (at least 1). Defaults to 200000.
+        seed (int, optional): Corpus seed. Defaults to 0.
+
+    Returns:
+        dict: Metadata and one result per case.
+    """
+    from spanish_nlp import SpanishPreprocess
+    from spanish_nlp.__about__ import __version__
+
+    results = []
+    for name in configs:
+        preprocessor = SpanishPreprocess(**CONFIGS[name])
+        for size in sizes:
+            if size > _MAX_SIZE.get(name, size):
+                continue
+            texts = generate_corpus(max(1, budget // size), size, seed)
+            n_chars = sum(map(len, texts))
+            for method in methods:
+                runner = _runner(preprocessor, method, texts)
+                if runner is None:
+                    continue
+                # Warm-up: lazy tables, caches and compiled patterns
+                runner()
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    runner()
+                    timings.append(time.perf_counter() - start)
+                best = min(timings)
+                results.append(
+                    {
+                        "config": name,
+                        "size": size,
+                        "method": method,
+                        "n_texts": len(texts),
+                        "n_chars": n_chars,
+                        "min_s": best,
+                        "median_s": statistics.median(timings),
+                        "chars_per_s": n_chars / best,
+                    }
+                )
+                logger.info(
+                    "%-22s %7d %-16s %9.4f s %10.0f chars/s", name, size, method, best, n_chars / best
+                )
+    return {
+        "metadata": {
+            "version": __version__,
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "budget": budget,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=None, help="JSON file to write (default: outputs/benchmarks/<commit>.json)")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="Small smoke run: fewer cases and characters")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    warnings.filterwarnings("ignore")
+    if args.quick:
+        args.configs = [name for name in args.configs if name != "lemmatize"]
+        args.sizes = [size for size in args.sizes if size <= 2_000]
+        args.repeat = 1
+        args.budget = 20_000
+
+    report = run(args.configs, args.sizes, args.methods, args.repeat, args.budget, args.seed)
+    output = args.output or os.path.join(
+        "outputs", "benchmarks", f"{report['metadata']['commit'] or 'current'}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info("Results written to %s", output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
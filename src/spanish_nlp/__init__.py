@@ -1,15 +1,43 @@
+import importlib
 import logging
 
-from .augmentation import *
-from .preprocess import SpanishPreprocess
-from .classifiers import SpanishClassifier
-from .spellchecker import SpanishSpellChecker
-
 # Configure logging for the library to avoid 'No handler found' warnings
 logging.getLogger(__name__).addHandler(logging.NullHandler())
 
+# Public names and the submodule that defines them. They are imported on first
+# access, so `import spanish_nlp` does not load torch, transformers or spaCy.
+_LAZY_ATTRIBUTES = {
+    "SpanishPreprocess": ".preprocess",
+    "MultiPreprocess": ".preprocess",
+    "NearDuplicateIndex": ".preprocess.dedup",
+    "SpanishClassifier": ".classifiers",
+    "SpanishSpellChecker": ".spellchecker",
+    "Masked": ".augmentation",
+    "Spelling": ".augmentation",
+}
+
+_SUBMODULES = ("augmentation", "classifiers", "preprocess", "spellchecker", "utils")
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | set(_SUBMODULES))
+
+
 __all__ = [
     "SpanishPreprocess",
+    "MultiPreprocess",
+    "NearDuplicateIndex",
     "SpanishClassifier",
     "SpanishSpellChecker",
     # Re-exporting augmentation classes might be needed depending on usage
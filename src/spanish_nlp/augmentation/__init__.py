@@ -1,8 +1,22 @@
-# __init__.py
-# Import Spelling in spelling.py (in the same folder)
-# from .spelling import Spelling
+# Masked (transformers) and Spelling are imported on first access
+import importlib
 
-from .masked import Masked
+_LAZY_ATTRIBUTES = {
+    "Masked": ".masked",
+    "Spelling": ".spelling",
+}
 
-# from .abstract import *
-from .spelling import Spelling
\ No newline at end of file
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+__all__ = ["Masked", "Spelling"]
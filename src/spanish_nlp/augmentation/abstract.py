@@ -27,13 +27,10 @@ Masked, DataAugmentationGenerative, DataAugmentationBackTranslation and DataAugm
 """
 
 import os
+import sys
 
-import es_core_news_sm
-import pandas as pd
-
-from datasets import load_dataset
-from tqdm import tqdm
-tqdm.pandas()
+# pandas, datasets, tqdm and spaCy are imported where they are used, so
+# importing an augmenter does not load them.
 
 class DataAugmentationAbstract:
     """
@@ -58,9 +55,9 @@ class DataAugmentationAbstract:
             return self._text_augment_(texts, num_samples)
         elif isinstance(texts, list):
             return self._list_augment_(texts, num_samples, num_workers)
-        elif isinstance(texts, pd.Series):
+        elif _is_instance_of_(texts, "pandas", "Series"):
             return self._pandas_augment_(texts, num_samples, num_workers)
-        elif isinstance(texts, load_dataset.Dataset):
+        elif _is_instance_of_(texts, "datasets", "Dataset"):
             return self._datasets_augment_(texts, num_samples, num_workers)
         else:
             raise ValueError(
@@ -77,6 +74,8 @@ class DataAugmentationAbstract:
         """
         Augment a list of texts.
         """
+        import pandas as pd
+
         return self._pandas_augment_(
             pd.Series(texts), num_samples, num_workers
         ).tolist()
@@ -89,6 +88,9 @@ class DataAugmentationAbstract:
         #     self._text_augment_,
         # )
         if num_workers == 1:
+            from tqdm import tqdm
+
+            tqdm.pandas()
             return texts.progress_apply(
                 self._text_augment_,
                 num_samples=num_samples
@@ -118,12 +120,14 @@ class DataAugmentationAbstract:
         # if "es_core_news_sm" not in sys.modules:
         #     import es_core_news_sm
 
-        if not hasattr(self, "nlp_spacy"):
-            self.nlp_spacy = es_core_news_sm.load(
-                disable=["ner", "parser", "tagger", "textcat", "vectors"]
-            )
-
+        # The spaCy model is loaded by the first call to the tokenizer
         def tokenizer(text):
+            if not hasattr(self, "nlp_spacy"):
+                import es_core_news_sm
+
+                self.nlp_spacy = es_core_news_sm.load(
+                    disable=["ner", "parser", "tagger", "textcat", "vectors"]
+                )
             return [token.text for token in self.nlp_spacy(text)]
 
         self.tokenizer = tokenizer
@@ -138,3 +142,12 @@ class DataAugmentationAbstract:
         Set the stopwords.
         """
         self.stopwords = stopwords
+
+
+def _is_instance_of_(obj, module, name):
+    """isinstance check against a class of an optional module, without importing it.
+
+    If the module has not been imported, obj cannot be one of its instances.
+    """
+    module = sys.modules.get(module)
+    return module is not None and isinstance(obj, getattr(module, name))
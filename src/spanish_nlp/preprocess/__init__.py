@@ -1 +1,4 @@
-from .preprocess import SpanishPreprocess
\ No newline at end of file
+from .fanout import MultiPreprocess
+from .preprocess import SpanishPreprocess
+
+__all__ = ["SpanishPreprocess", "MultiPreprocess"]
@@ -0,0 +1,186 @@
+"""
+Columnar preprocessing with pyarrow.compute kernels.
+
+Steps whose patterns have an RE2 equivalent run as vectorized kernels over
+whole string columns. Consecutive steps without a kernel (stemming,
+lemmatization, emojis, character tables, HTML markup, backreference
+patterns) run together in Python on the rows of the column, so each such
+run converts the data to Python strings only once.
+"""
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, List
+
+from spanish_nlp.utils.re2_syntax import to_re2
+
+from . import preprocess as _preprocess
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+    from .preprocess import SpanishPreprocess
+
+# RE2 version of _NUMBER_OR_HASHTAG_PATTERN: the lookahead "\d*[^\W\d]" is
+# consumed instead, which gives the same matches because "\w+" takes the
+# whole word run anyway.
+_NUMBER_OR_HASHTAG_RE2 = r"#[\p{Nd}]*[\p{L}\p{Nl}\p{No}_][\p{L}\p{N}_]*|[\p{Nd}]+"
+
+# str.lower has special cases that utf8_lower does not apply (final sigma and
+# the dotted capital I); rows containing them are lowercased in Python.
+_SPECIAL_LOWER_RE2 = "[Σİ]"
+
+
+def _regex(pattern, replacement: str = "") -> Callable:
+    source = pattern if isinstance(pattern, str) else to_re2(pattern.pattern)
+    if source is None:
+        raise ValueError(f"Pattern {pattern.pattern!r} has no RE2 equivalent")
+
+    def kernel(array):
+        import pyarrow.compute as pc
+
+        return pc.replace_substring_regex(array, pattern=source, replacement=replacement)
+
+    return kernel
+
+
+def _replace(pattern: str, replacement: str) -> Callable:
+    def kernel(array):
+        import pyarrow.compute as pc
+
+        return pc.replace_substring(array, pattern=pattern, replacement=replacement)
+
+    return kernel
+
+
+def _strip(array):
+    import pyarrow.compute as pc
+
+    return pc.utf8_trim_whitespace(array)
+
+
+def _lower(array):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    lowered = pc.utf8_lower(array)
+    special = pc.fill_null(pc.match_substring_regex(array, _SPECIAL_LOWER_RE2), False)
+    if not pc.any(special).as_py():
+        return lowered
+    values = [value.lower() for value in pc.filter(array, special).to_pylist()]
+    return pc.replace_with_mask(lowered, special, pa.array(values, type=array.type))
+
+
+@lru_cache(maxsize=None)
+def arrow_kernels() -> Dict[str, List[Callable]]:
+    """Return the kernels of every plan step that can run in pyarrow.compute.
+
+    Returns:
+        dict: Step name to the list of kernels that reproduce it, in order.
+    """
+    p = _preprocess
+    multiple_spaces = [_regex(p._MULTIPLE_SPACES_PATTERN, " "), _strip]
+    return {
+        "_lower_": [_lower],
+        "_remove_url_": [_regex(p._URL_PATTERN), _replace("  ", " ")],
+        "_remove_numbers_": [_regex(p._NUMBER_PATTERN)],
+        "_remove_hashtags_": [_regex(p._HASHTAG_PATTERN), _strip, _replace("  ", " ")],
+        "_remove_numbers_+_remove_hashtags_": [
+            _regex(_NUMBER_OR_HASHTAG_RE2),
+            _strip,
+            _replace("  ", " "),
+        ],
+        "_remove_punctuation_": [_regex(p._PUNCTUATION_PATTERN, " ")],
+        "_remove_multiples_spaces_": multiple_spaces,
+        "_normalize_breaklines_": [
+            _replace("\r", "\n"),
+            _regex(p._BREAKLINES_PATTERN, "\n"),
+            _strip,
+        ],
+        "_normalize_punctuation_spelling_": [
+            # RE2 is linear without the lookbehind of the re pattern
+            _regex(to_re2(p._SPACE_BEFORE_PUNCTUATION), r"\1"),
+            _regex(p._SPACE_AFTER_PUNCTUATION_PATTERN, r"\1"),
+            _regex(p._MISSING_SPACE_PATTERN, r"\1 \2"),
+            *multiple_spaces,
+            _strip,
+        ],
+    }
+
+
+def transform_arrow(preprocessor: "SpanishPreprocess", array: "pa.Array") -> "pa.Array":
+    """Run the plan of a preprocessor over a string column.
+
+    Args:
+        preprocessor (SpanishPreprocess): Preprocessor whose plan is applied.
+        array (pyarrow.Array or pyarrow.ChunkedArray): string or large_string column.
+            Nulls are kept as nulls.
+
+    Returns:
+        pyarrow.Array or pyarrow.ChunkedArray: Transformed column of the same type.
+    """
+    import pyarrow as pa
+
+    if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+        raise TypeError(f"Expected a string column, got {array.type}")
+    if isinstance(array, pa.ChunkedArray):
+        return pa.chunked_array(
+            [transform_arrow(preprocessor, chunk) for chunk in array.chunks], type=array.type
+        )
+
+    kernels = arrow_kernels()
+    python_steps = []
+    for step in preprocessor._plan:
+        if step.name in kernels:
+            array = _run_python_(python_steps, array)
+            python_steps = []
+            for kernel in kernels[step.name]:
+                array = kernel(array)
+        else:
+            python_steps.append(step)
+    return _run_python_(python_steps, array)
+
+
+def _run_python_(steps, array):
+    """Run plan steps without a kernel on the non-null rows of a column."""
+    if not steps:
+        return array
+    import pyarrow as pa
+
+    values = array.to_pylist()
+    rows = [i for i, value in enumerate(values) if value is not None]
+    texts = [values[i] for i in rows]
+    for step in steps:
+        if step.batch is not None:
+            texts = step.batch(texts)
+        else:
+            texts = [step.func(text) for text in texts]
+    for i, text in zip(rows, texts):
+        values[i] = text
+    return pa.array(values, type=array.type)
+
+
+def transform_pandas(preprocessor: "SpanishPreprocess", series):
+    """Transform a pandas Series of strings through transform_arrow.
+
+    The dtype of the Series is kept. Series backed by Arrow (pd.ArrowDtype or
+    string[pyarrow]) are never converted to Python strings on the way back.
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    result = transform_arrow(preprocessor, pa.Array.from_pandas(series))
+    if isinstance(series.dtype, pd.ArrowDtype):
+        values = pd.arrays.ArrowExtensionArray(result)
+    elif getattr(series.dtype, "storage", None) == "pyarrow":
+        values = pd.array(result, dtype=series.dtype)
+    else:
+        values = result.to_pandas().to_numpy(dtype=object)
+    return pd.Series(values, index=series.index, name=series.name, dtype=series.dtype)
+
+
+def transform_polars(preprocessor: "SpanishPreprocess", series):
+    """Transform a polars Series of strings through transform_arrow."""
+    import polars as pl
+
+    result = transform_arrow(preprocessor, series.to_arrow())
+    return pl.Series(series.name, result)
@@ -0,0 +1,148 @@
+"""
+Request coalescing used by SpanishPreprocess.transform_async.
+
+Texts submitted from coroutines are queued and transformed by a single
+dispatch thread, one batch at a time, so the event loop is never blocked.
+While a batch runs, new texts wait in the queue and go together into the
+next transform_batch call: an idle service answers each request at once and
+a busy one processes larger batches instead of queuing many small ones.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, List, Tuple
+
+if TYPE_CHECKING:
+    from .preprocess import SpanishPreprocess
+
+logger = logging.getLogger(__name__)
+
+_CLOSED_MESSAGE = "The preprocessor was closed before transforming this text."
+
+
+class AsyncBatcher:
+    """Queue of texts waiting to be transformed, bound to one event loop."""
+
+    def __init__(
+        self,
+        preprocessor: "SpanishPreprocess",
+        n_jobs: int = 1,
+        batch_size: int = 64,
+        max_in_flight: int = 4096,
+    ):
+        """Init class. Must be called from a coroutine running in the loop that will use it.
+
+        Args:
+            preprocessor (SpanishPreprocess): Preprocessor that transforms the texts.
+            n_jobs (int, optional): Worker processes used for each batch, as in
+                transform_batch. 1 transforms in the dispatch thread. Defaults to 1.
+            batch_size (int, optional): Maximum number of texts in a batch. Defaults to 64.
+            max_in_flight (int, optional): Maximum number of texts queued or being
+                transformed; further submissions wait for a slot. Defaults to 4096.
+        """
+        if batch_size < 1 or max_in_flight < 1:
+            raise ValueError("batch_size and max_in_flight must be positive integers.")
+        self.preprocessor = preprocessor
+        self.n_jobs = n_jobs
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._busy = False
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="spanish_nlp")
+
+    async def transform(self, texts: List[str]) -> List[str]:
+        """Queue texts and wait for their transformations.
+
+        Args:
+            texts (list): Texts to transform.
+
+        Returns:
+            list: Transformed texts, in the same order as the input.
+        """
+        futures = []
+        for text in texts:
+            await self._slots.acquire()
+            if self._closed:
+                self._slots.release()
+                raise RuntimeError(_CLOSED_MESSAGE)
+            future = self.loop.create_future()
+            self._pending.append((text, future))
+            futures.append(future)
+            if not self._busy:
+                # Let the other coroutines of this loop iteration join the batch
+                self._busy = True
+                self.loop.call_soon(self._dispatch)
+        return list(await asyncio.gather(*futures))
+
+    def _dispatch(self) -> None:
+        """Send the next batch to the dispatch thread, or go idle when the queue is empty."""
+        if self._closed:
+            self._fail_pending()
+            self._busy = False
+            return
+        batch, self._pending = self._pending[: self.batch_size], self._pending[self.batch_size :]
+        if not batch:
+            self._busy = False
+            return
+        logger.debug("Transforming a batch of %d texts", len(batch))
+        texts = [text for text, _ in batch]
+        transform_batch = partial(self.preprocessor.transform_batch, n_jobs=self.n_jobs)
+        done = self.loop.run_in_executor(self._executor, transform_batch, texts)
+        done.add_done_callback(partial(self._finish, batch))
+
+    def _finish(self, batch: List[Tuple[str, asyncio.Future]], done: asyncio.Future) -> None:
+        """Hand the results of a batch to their callers and start the next batch.
+
+        When the batch fails, its texts are transformed one by one so that only
+        the callers of the texts that fail get the error.
+        """
+        if not done.cancelled() and done.exception() is None:
+            for (_, future), result in zip(batch, done.result()):
+                self._slots.release()
+                if not future.done():
+                    future.set_result(result)
+        elif len(batch) > 1 and not done.cancelled() and not self._closed:
+            logger.warning(
+                "A batch of %d texts failed (%r), transforming its texts one by one",
+                len(batch),
+                done.exception(),
+            )
+            for text, future in batch:
+                single = self.loop.run_in_executor(self._executor, self.preprocessor.transform, text)
+                single.add_done_callback(partial(self._settle, future))
+        else:
+            for _, future in batch:
+                self._settle(future, done)
+        self._dispatch()
+
+    def _settle(self, future: asyncio.Future, done: asyncio.Future) -> None:
+        """Give the caller of a text the outcome of its transformation."""
+        self._slots.release()
+        if future.done():
+            return
+        if done.cancelled():
+            future.cancel()
+        elif done.exception() is not None:
+            future.set_exception(done.exception())
+        else:
+            future.set_result(done.result())
+
+    def _fail_pending(self) -> None:
+        """Fail the texts still waiting in the queue of a closed batcher."""
+        batch, self._pending = self._pending, []
+        for _, future in batch:
+            self._slots.release()
+            if not future.done():
+                future.set_exception(RuntimeError(_CLOSED_MESSAGE))
+
+    def close(self) -> None:
+        """Stop the dispatch thread once the running batch is done and fail the queued texts."""
+        self._closed = True
+        self._executor.shutdown(wait=False)
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._fail_pending)
@@ -0,0 +1,275 @@
+"""
+Content-addressed caches for SpanishPreprocess results.
+
+Entries are keyed by a fingerprint of the preprocessor configuration plus a
+BLAKE2b hash of the input text, so a preprocessor built with different options
+never reads the entries of another one, even when they share a cache.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from importlib import metadata
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from spanish_nlp.__about__ import __version__
+
+# Maximum number of parameters in a single SQLite query
+_SQLITE_BATCH = 500
+
+
+class CacheStats(NamedTuple):
+    """Counters reported by TransformCache.stats."""
+
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@lru_cache(maxsize=None)
+def _package_version(package: str) -> Optional[str]:
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def dependency_versions(config: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """Return the versions of the libraries whose data the enabled steps use.
+
+    Emoji names come from emoji, stems and the 'nltk' stopwords from nltk, and
+    lemmas and the 'spacy' stopwords from spaCy and its Spanish model.
+
+    Args:
+        config (dict): SpanishPreprocess constructor options.
+
+    Returns:
+        dict: Package name to installed version (None when it is not installed).
+    """
+    packages = set()
+    if config.get("convert_emojis") or not config.get("remove_emojis", True):
+        packages.add("emoji")
+    if config.get("stem"):
+        packages.add("nltk")
+    if config.get("lemmatize"):
+        packages.update(("spacy", "es_core_news_sm"))
+    stopwords = config.get("stopwords_list")
+    if config.get("remove_stopwords") and isinstance(stopwords, str):
+        names = stopwords.split("+")
+        if "nltk" in names:
+            packages.add("nltk")
+        if "spacy" in names:
+            packages.add("spacy")
+    return {package: _package_version(package) for package in sorted(packages)}
+
+
+def config_fingerprint(config: Dict[str, Any]) -> str:
+    """Hash the options of a preprocessor with the versions of the libraries that run them.
+
+    Args:
+        config (dict): SpanishPreprocess constructor options.
+
+    Returns:
+        str: Hex digest that changes whenever any option or any of those versions changes.
+    """
+
+    def default(value):
+        if isinstance(value, (set, frozenset)):
+            return sorted(value)
+        return repr(value)
+
+    payload = json.dumps(
+        [__version__, dependency_versions(config), config], sort_keys=True, default=default
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def text_key(fingerprint: str, text: str) -> str:
+    """Build the cache key of a text for the given configuration fingerprint."""
+    digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16)
+    return fingerprint + digest.hexdigest()
+
+
+class TransformCache(ABC):
+    """Base class of the transform caches.
+
+    Subclasses implement _get_many_, _set_many_ and __len__; hit and miss
+    counters are kept here.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value of a key, or None."""
+        return self.get_many([key])[0]
+
+    def set(self, key: str, value: str) -> None:
+        """Store the value of a key."""
+        self.set_many([(key, value)])
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        """Return the cached values of several keys, with None for missing keys."""
+        with self._lock:
+            values = self._get_many_(keys)
+            hits = sum(value is not None for value in values)
+            self.hits += hits
+            self.misses += len(values) - hits
+        return values
+
+    def set_many(self, items: Iterable[tuple]) -> None:
+        """Store several (key, value) pairs."""
+        items = list(items)
+        if items:
+            with self._lock:
+                self._set_many_(items)
+
+    def stats(self) -> CacheStats:
+        """Return the hits, misses and number of entries of the cache."""
+        return CacheStats(self.hits, self.misses, len(self))
+
+    def reset_stats(self) -> None:
+        """Reset the hit and miss counters."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every entry."""
+
+    def close(self) -> None:
+        """Release the resources held by the cache."""
+
+    @abstractmethod
+    def _get_many_(self, keys: List[str]) -> List[Optional[str]]:
+        """Return the values of several keys; called with the lock held."""
+
+    @abstractmethod
+    def _set_many_(self, items: List[tuple]) -> None:
+        """Store several (key, value) pairs; called with the lock held."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Return the number of entries."""
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class LRUCache(TransformCache):
+    """In-memory cache that evicts the least recently used entries."""
+
+    def __init__(self, maxsize: int = 100_000):
+        """Init class.
+
+        Args:
+            maxsize (int, optional): Maximum number of entries. Defaults to 100000.
+        """
+        super().__init__()
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, str] = OrderedDict()
+
+    def _get_many_(self, keys):
+        values = []
+        for key in keys:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            values.append(value)
+        return values
+
+    def _set_many_(self, items):
+        for key, value in items:
+            self._data[key] = value
+            self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache(TransformCache):
+    """Persistent cache stored in a SQLite database file.
+
+    The file can be shared by several preprocessors and processes; each
+    configuration only sees its own entries.
+    """
+
+    def __init__(self, path: str):
+        """Open or create the database.
+
+        Args:
+            path (str): Database file. ':memory:' keeps it in memory.
+        """
+        super().__init__()
+        self.path = str(path)
+        self._connect_()
+
+    def _connect_(self):
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS transform_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._connection.commit()
+
+    def _get_many_(self, keys):
+        found = {}
+        for i in range(0, len(keys), _SQLITE_BATCH):
+            batch = keys[i : i + _SQLITE_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            found.update(
+                self._connection.execute(
+                    f"SELECT key, value FROM transform_cache WHERE key IN ({placeholders})", batch
+                )
+            )
+        return [found.get(key) for key in keys]
+
+    def _set_many_(self, items):
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO transform_cache (key, value) VALUES (?, ?)", items
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM transform_cache")
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM transform_cache").fetchone()[0]
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        del state["_connection"]
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._connect_()
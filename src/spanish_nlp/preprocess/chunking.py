@@ -0,0 +1,317 @@
+"""
+Chunked transformation of very large documents.
+
+A long text is cut at line breaks between two plain words (letters, with at
+most one closing punctuation mark) that are not inside HTML markup. No step
+can remove such a word, turn it into spaces or match across the break, so
+each chunk can be transformed on its own and the results joined with the
+text the break becomes in the unchunked output. Spam reduction is the only step whose matches can reach
+across a break; the words around each seam are checked and the two chunks
+are transformed again as one when a repetition touches their seam.
+"""
+
+import logging
+import re
+from typing import TYPE_CHECKING, Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from spanish_nlp.utils.char_table import VOWEL_ACCENTS_TABLE
+from spanish_nlp.utils.emo_unicode import emoticon_pattern
+from spanish_nlp.utils.markup import open_markup, skip_markup
+from spanish_nlp.utils.spam import (
+    WHITESPACE_SPLIT_PATTERN,
+    reduce_repeated_phrases,
+    reduce_repeated_words,
+)
+
+from .cache import text_key
+from .stream import iter_buffers
+
+if TYPE_CHECKING:
+    from .preprocess import SpanishPreprocess
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+# Longer words are never used as the edge of a chunk
+MAX_EDGE_WORD_LENGTH = 40
+
+# Runs of line breaks between two non-space characters
+_BREAK_PATTERN = re.compile(r"(?<=\S)\n+(?=\S)")
+_EDGE_WORD_PATTERN = re.compile(r"([a-zA-ZáéíóúüñÁÉÍÓÚÜÑ]+)([.,;:!?]?)")
+_LAST_TOKEN_PATTERN = re.compile(r"\S+\Z")
+_FIRST_TOKEN_PATTERN = re.compile(r"\S+")
+
+# Steps that look at the whole text: spaCy uses the context of every word and
+# protected spans fall back to the round trip when any part of the text
+# cannot be protected.
+_UNCHUNKABLE_STEPS = ("_lemmatize_", "_protect_spans_")
+# Steps that join all the words with single spaces
+_COLLAPSING_STEPS = ("_remove_stopwords_", "_stem_")
+# Steps whose comments, scripts and tags can span several lines
+_MARKUP_STEPS = ("_remove_html_tags_", "_remove_html_tags_+_remove_numbers_")
+# Units around a seam compared by the spam check
+_SEAM_UNITS = 8
+
+
+def is_chunkable(preprocessor: "SpanishPreprocess") -> bool:
+    """Whether the plan of the preprocessor can run on chunks of a text."""
+    names = {step.name for step in preprocessor._plan}
+    return preprocessor.spam_max_length is None and not names.intersection(_UNCHUNKABLE_STEPS)
+
+
+def _edge_word_filter(preprocessor: "SpanishPreprocess") -> Callable[[str], bool]:
+    """Build the test for words that can be the last or first word of a chunk."""
+    names = {step.name for step in preprocessor._plan}
+    emoticons = emoticon_pattern() if "_emoticons_to_text_" in names else None
+    inclusive = preprocessor._inclusive_normalizer
+    stopwords = preprocessor.stopwords_list if "_remove_stopwords_" in names else None
+
+    def is_edge_word(token: str) -> bool:
+        match = _EDGE_WORD_PATTERN.fullmatch(token)
+        if match is None:
+            return False
+        if emoticons is not None and emoticons.search(token):
+            return False
+        word = match.group(1)
+        forms = {word, token, word.lower(), token.lower()}
+        if inclusive is not None and not forms.isdisjoint(inclusive.words):
+            return False
+        if stopwords is not None:
+            forms |= {form.translate(VOWEL_ACCENTS_TABLE) for form in forms}
+            if not forms.isdisjoint(stopwords):
+                return False
+        return True
+
+    return is_edge_word
+
+
+def _token_before(text: str, end: int) -> str:
+    start = max(0, end - MAX_EDGE_WORD_LENGTH - 1)
+    match = _LAST_TOKEN_PATTERN.search(text, start, end)
+    if match is None or (match.start() == start and start > 0 and not text[start - 1].isspace()):
+        return ""
+    return match.group()
+
+
+def _token_after(text: str, start: int) -> str:
+    end = min(len(text), start + MAX_EDGE_WORD_LENGTH + 1)
+    match = _FIRST_TOKEN_PATTERN.match(text, start, end)
+    if match is None or (match.end() == end and end < len(text) and not text[end].isspace()):
+        return ""
+    return match.group()
+
+
+def split_document(
+    preprocessor: "SpanishPreprocess", text: str, chunk_size: int
+) -> Iterator[Tuple[str, int, int]]:
+    """Cut a text into chunks of at least chunk_size characters.
+
+    Args:
+        preprocessor (SpanishPreprocess): Preprocessor that will transform the chunks.
+        text (str): Text to cut.
+        chunk_size (int): Minimum number of characters of each chunk but the last.
+
+    Yields:
+        tuple: The text the preceding break becomes in the transformed output
+        ("" for the first chunk), and the start and end of the chunk in text.
+    """
+    is_edge_word = _edge_word_filter(preprocessor)
+    names = {step.name for step in preprocessor._plan}
+    collapse = not names.isdisjoint(_COLLAPSING_STEPS)
+    markup = not names.isdisjoint(_MARKUP_STEPS)
+    remove_urls = "_remove_url_" in names
+
+    def next_cut(start: int) -> Optional[re.Match]:
+        position = start + chunk_size
+        while True:
+            for match in _BREAK_PATTERN.finditer(text, position):
+                if is_edge_word(_token_before(text, match.start())) and is_edge_word(
+                    _token_after(text, match.end())
+                ):
+                    break
+            else:
+                return None
+            opening = open_markup(text, start, match.start(), remove_urls) if markup else None
+            if opening is None:
+                return match
+            # Look again after the markup that goes over the break
+            position = max(skip_markup(text, opening), match.end())
+
+    joiner = ""
+    start = 0
+    while True:
+        match = next_cut(start)
+        if match is None:
+            yield joiner, start, len(text)
+            return
+        left = _token_before(text, match.start())
+        yield joiner, start, match.start()
+        if collapse:
+            joiner = " "
+        else:
+            # Removed closing punctuation leaves a space before the break
+            space = " " if preprocessor.remove_punctuation and not left[-1].isalpha() else ""
+            joiner = space + ("\n" if preprocessor.normalize_breaklines else match.group())
+        start = match.end()
+
+
+def _edge_parts(text: str, units: int, last: bool) -> List[str]:
+    """The last (or first) words of a text and the whitespace after each one."""
+    count = 2 * units + 1
+    size = 64 * units
+    while True:
+        window = text[-size:] if last else text[:size]
+        parts = WHITESPACE_SPLIT_PATTERN.split(window)
+        if size >= len(text):
+            return parts
+        # The outermost part of the window may be a cut word
+        if len(parts) > count:
+            return parts[-count:] if last else parts[:count]
+        size *= 4
+
+
+def _repeats_across(
+    left_parts: List[str], joiner: str, right_parts: List[str], distance: int, left_is_first: bool
+) -> bool:
+    """Whether a unit (word and the whitespace after it) of the seam has a twin.
+
+    Repeated words (distance 1) and phrases (distance 3) are reduced by
+    comparing each unit with the one that many units before it. Twins are
+    related by suffix because a run may start inside a word. A chunk with
+    only a few units between two seams is always reported, since a run could
+    go through it from one seam to the other.
+
+    Args:
+        left_parts (list): _edge_parts of the end of the left chunk.
+        joiner (str): Text between the chunks.
+        right_parts (list): _edge_parts of the start of the right chunk.
+        distance (int): Units between twins.
+        left_is_first (bool): whether the left chunk starts the text.
+    """
+    if not left_is_first and len(left_parts) < 2 * _SEAM_UNITS + 1:
+        return True
+    joiner_parts = WHITESPACE_SPLIT_PATTERN.split(joiner)
+    parts = (
+        left_parts[:-1]
+        + [left_parts[-1] + joiner_parts[0]]
+        + joiner_parts[1:-1]
+        + [joiner_parts[-1] + right_parts[0]]
+        + right_parts[1:]
+    )
+    words, spaces = parts[0::2], parts[1::2]
+    first_seam_unit = len(left_parts) // 2
+    for unit in range(first_seam_unit, first_seam_unit + len(joiner_parts) // 2):
+        for twin in (unit - distance, unit + distance):
+            if not 0 <= twin < len(spaces) or spaces[twin] != spaces[unit]:
+                continue
+            word, other = words[unit], words[twin]
+            if word and other and (word.endswith(other) or other.endswith(word)):
+                return True
+    return False
+
+
+class _Piece(NamedTuple):
+    """A transformed chunk and what the spam check needs to know about its end."""
+
+    joiner: str
+    start: int
+    output: str
+    # Last words of the chunk before spam reduction and after reducing repeated words
+    head_edge: List[str]
+    words_edge: List[str]
+
+
+def _transform_heads(
+    preprocessor: "SpanishPreprocess", chunks: List[str], stop: int, n_jobs: int
+) -> List[str]:
+    """Run the steps of the plan before stop on every chunk."""
+    if n_jobs == 1:
+        return preprocessor._transform_many_(chunks, stop)
+    return preprocessor._get_pool_(n_jobs).map(chunks, 1, stop)
+
+
+def _transform_in_chunks(
+    preprocessor: "SpanishPreprocess", text: str, chunk_size: int, n_jobs: int
+) -> Optional[str]:
+    """Transform the chunks of a text and join them.
+
+    Two chunks whose seam is touched by a repetition are transformed again as
+    one chunk.
+
+    Returns:
+        str or None: The transformed text, or None when merging chunks would
+        transform more characters than the text has.
+    """
+    names = [step.name for step in preprocessor._plan]
+    spam = "_reduce_spam_" in names
+    stop = names.index("_reduce_spam_") if spam else len(names)
+    rest = preprocessor._plan[stop + 1 :]
+
+    pieces: List[_Piece] = []
+    merged = 0
+    for buffer in iter_buffers(split_document(preprocessor, text, chunk_size), n_jobs):
+        heads = _transform_heads(preprocessor, [text[start:end] for _, start, end in buffer], stop, n_jobs)
+        for (joiner, start, end), head in zip(buffer, heads):
+            while True:
+                words = reduce_repeated_words(head) if spam else head
+                if not spam or not pieces:
+                    break
+                previous = pieces[-1]
+                left_is_first = len(pieces) == 1
+                if not (
+                    _repeats_across(
+                        previous.head_edge, joiner, _edge_parts(head, _SEAM_UNITS, False), 1, left_is_first
+                    )
+                    or _repeats_across(
+                        previous.words_edge, joiner, _edge_parts(words, _SEAM_UNITS, False), 3, left_is_first
+                    )
+                ):
+                    break
+                pieces.pop()
+                joiner, start = previous.joiner, previous.start
+                merged += end - start
+                if merged > len(text):
+                    return None
+                head = preprocessor._transform_many_([text[start:end]], stop)[0]
+            output = reduce_repeated_phrases(words) if spam else head
+            for step in rest:
+                output = step.func(output)
+            pieces.append(
+                _Piece(
+                    joiner,
+                    start,
+                    output,
+                    _edge_parts(head, _SEAM_UNITS, True),
+                    _edge_parts(words, _SEAM_UNITS, True),
+                )
+            )
+    return "".join(part for piece in pieces for part in (piece.joiner, piece.output))
+
+
+def transform_chunked(
+    preprocessor: "SpanishPreprocess", text: str, chunk_size: int = DEFAULT_CHUNK_SIZE, n_jobs: int = 1
+) -> str:
+    """Transform a long text in chunks, with the same output as transform.
+
+    See SpanishPreprocess.transform_chunked.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+    cache = preprocessor.cache
+    if cache is not None:
+        key = text_key(preprocessor._fingerprint, text)
+        transformed = cache.get(key)
+        if transformed is not None:
+            return transformed
+
+    transformed = None
+    if len(text) > chunk_size and is_chunkable(preprocessor):
+        transformed = _transform_in_chunks(preprocessor, text, chunk_size, n_jobs)
+        if transformed is None:
+            logger.debug("Too many repetitions cross chunk boundaries, transforming the text in one piece")
+    if transformed is None:
+        transformed = preprocessor._apply_plan_(text)
+
+    if cache is not None:
+        cache.set(key, transformed)
+    return transformed
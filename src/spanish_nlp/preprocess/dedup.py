@@ -0,0 +1,219 @@
+"""
+Near-duplicate detection with MinHash signatures and an LSH index.
+
+Each text is reduced to the set of its character shingles and summarized by
+a MinHash signature: the probability that two signatures agree on a value is
+the Jaccard similarity of the shingle sets. Signatures are cut into bands,
+and texts that share a whole band are candidates; a candidate is a
+near-duplicate when the estimated similarity reaches the threshold.
+
+The index keeps at most max_size texts and forgets the oldest ones first, so
+it can follow a rolling window of a stream with bounded memory.
+"""
+
+import zlib
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+)
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .preprocess import SpanishPreprocess
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class _Entry(NamedTuple):
+    signature: np.ndarray
+    representative: Hashable
+
+
+def shingles(text: str, size: int = 5) -> Set[str]:
+    """Character shingles of a text, with its whitespace runs collapsed.
+
+    Args:
+        text (str): Text, usually already preprocessed.
+        size (int, optional): Characters per shingle. Defaults to 5.
+
+    Returns:
+        set: Substrings of size characters. Shorter texts give a single shingle
+        with the whole text, and empty texts give none.
+    """
+    text = " ".join(text.split())
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class NearDuplicateIndex:
+    """Incremental, bounded index that groups near-duplicate texts into clusters."""
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        max_size: Optional[int] = 100_000,
+        preprocessor: Optional["SpanishPreprocess"] = None,
+        seed: int = 0,
+    ):
+        """Init class.
+
+        Args:
+            threshold (float, optional): Minimum estimated Jaccard similarity of the
+                shingles of two near-duplicates. Defaults to 0.7.
+            num_perm (int, optional): Values in each MinHash signature. Defaults to 128.
+            bands (int, optional): LSH bands; must divide num_perm. More bands find
+                candidates with a lower similarity. Defaults to 16.
+            shingle_size (int, optional): Characters per shingle. Defaults to 5.
+            max_size (int, optional): Maximum number of texts kept in the index; the
+                oldest are forgotten first. None keeps every text. Defaults to 100000.
+            preprocessor (SpanishPreprocess, optional): Preprocessor applied to the texts
+                before computing their signatures. Defaults to None (texts are used as
+                they are).
+            seed (int, optional): Seed of the hash permutations. Defaults to 0.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1].")
+        if num_perm < 1 or bands < 1 or num_perm % bands:
+            raise ValueError("bands must be a positive divisor of num_perm.")
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size must be a positive integer or None.")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_size = max_size
+        self.preprocessor = preprocessor
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 61, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 61, size=num_perm, dtype=np.uint64)
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._buckets: List[Dict[bytes, Set[Hashable]]] = [{} for _ in range(bands)]
+        self._next_key = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of the shingles of a (preprocessed) text.
+
+        Args:
+            text (str): Text, already preprocessed when the index has a preprocessor.
+
+        Returns:
+            numpy.ndarray: num_perm uint32 values. Texts without shingles get the
+            maximum value everywhere.
+        """
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8", "surrogatepass")) for shingle in shingles(text, self.shingle_size)),
+            dtype=np.uint64,
+        )
+        if not len(hashes):
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys_(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows : (i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _find_(self, signature: np.ndarray, band_keys: List[bytes]) -> Optional[Hashable]:
+        """Key of the most similar indexed text above the threshold, if any."""
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, band_keys):
+            candidates.update(buckets.get(band_key, ()))
+        best, best_similarity = None, self.threshold
+        for key in candidates:
+            similarity = float(np.mean(self._entries[key].signature == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = key, similarity
+        return best
+
+    def query(self, text: str) -> Optional[Hashable]:
+        """Find the cluster of a text without adding it to the index.
+
+        Args:
+            text (str): Text to look up.
+
+        Returns:
+            Hashable or None: Representative of the cluster of its most similar
+            indexed text, or None when it has no near-duplicate.
+        """
+        if self.preprocessor is not None:
+            text = self.preprocessor.transform(text)
+        signature = self.signature(text)
+        match = self._find_(signature, self._band_keys_(signature))
+        return None if match is None else self._entries[match].representative
+
+    def add(self, text: str, key: Optional[Hashable] = None) -> Hashable:
+        """Add a text to the index and return the representative of its cluster.
+
+        Args:
+            text (str): Text to add.
+            key (Hashable, optional): Key of the text. Defaults to consecutive integers.
+
+        Returns:
+            Hashable: Representative of the cluster of its most similar indexed
+            text, or the key of the text itself when it has no near-duplicate.
+        """
+        if self.preprocessor is not None:
+            text = self.preprocessor.transform(text)
+        return self._add_signature_(self.signature(text), key)
+
+    def add_batch(self, texts: Iterable[str], keys: Optional[Iterable[Hashable]] = None) -> List[Hashable]:
+        """Add texts in order and return the representative of each one.
+
+        The texts are preprocessed with transform_batch. Texts of the same batch
+        can be near-duplicates of each other.
+
+        Args:
+            texts (iterable of str): Texts to add.
+            keys (iterable, optional): Key of each text. Defaults to consecutive integers.
+
+        Returns:
+            list: Representative of the cluster of each text, as in add.
+        """
+        texts = list(texts)
+        if self.preprocessor is not None:
+            texts = self.preprocessor.transform_batch(texts)
+        keys = [None] * len(texts) if keys is None else list(keys)
+        if len(keys) != len(texts):
+            raise ValueError("keys must have one key per text.")
+        return [self._add_signature_(self.signature(text), key) for text, key in zip(texts, keys)]
+
+    def _add_signature_(self, signature: np.ndarray, key: Optional[Hashable]) -> Hashable:
+        if key is None:
+            key = self._next_key
+            self._next_key += 1
+        if key in self._entries:
+            self._remove_(key)
+        band_keys = self._band_keys_(signature)
+        match = self._find_(signature, band_keys)
+        representative = key if match is None else self._entries[match].representative
+        self._entries[key] = _Entry(signature, representative)
+        for buckets, band_key in zip(self._buckets, band_keys):
+            buckets.setdefault(band_key, set()).add(key)
+        if self.max_size is not None and len(self._entries) > self.max_size:
+            self._remove_(next(iter(self._entries)))
+        return representative
+
+    def _remove_(self, key: Hashable) -> None:
+        """Forget an indexed text."""
+        entry = self._entries.pop(key)
+        for buckets, band_key in zip(self._buckets, self._band_keys_(entry.signature)):
+            bucket = buckets[band_key]
+            bucket.discard(key)
+            if not bucket:
+                del buckets[band_key]
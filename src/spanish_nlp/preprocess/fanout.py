@@ -0,0 +1,181 @@
+"""
+Transformation of the same texts with several SpanishPreprocess configurations.
+
+The plans of the configurations are merged into a tree where equal leading
+steps are shared, so a step that starts the plan of several configurations
+(splitting hashtags, lowercasing, removing URLs and HTML tags...) runs once
+per text instead of once per configuration.
+"""
+
+import logging
+from typing import Dict, Hashable, Iterable, List, Optional, Union
+
+from .preprocess import SpanishPreprocess, _PlanStep
+
+logger = logging.getLogger(__name__)
+
+# Attributes of the preprocessor that change the output of a step, for the
+# steps that depend on any. Steps missing from both tuples below are never
+# shared.
+_STEP_ATTRIBUTES = {
+    "_split_hashtags_": ("segment_hashtags",),
+    "_remove_html_tags_": ("lower",),
+    "_remove_html_tags_+_remove_numbers_": ("lower",),
+    "_lemmatize_": ("lemma_cache_size",),
+    "_normalize_inclusive_language_": ("inclusive_words",),
+    "_normalize_characters_": (
+        "remove_vowels_accents",
+        "remove_unprintable",
+        "normalize_fancy_letters",
+        "lower",
+    ),
+    "_remove_stopwords_": ("stopwords_list",),
+    "_reduce_spam_": ("spam_max_length",),
+    "_remove_reduplications_": ("spam_max_length",),
+}
+# Steps whose output only depends on the text
+_PURE_STEPS = (
+    "_lower_",
+    "_remove_url_",
+    "_remove_numbers_",
+    "_remove_hashtags_",
+    "_remove_numbers_+_remove_hashtags_",
+    "_stem_",
+    "_emojis_to_text_",
+    "_emoticons_to_text_",
+    "_remove_punctuation_",
+    "_text_to_emojis_",
+    "_text_to_emoticons_",
+    "_remove_multiples_spaces_",
+    "_normalize_breaklines_",
+    "_normalize_punctuation_spelling_",
+)
+
+
+def _hashable(value):
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if isinstance(value, dict):
+        return frozenset((key, _hashable(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    return value
+
+
+def step_key(preprocessor: SpanishPreprocess, step: _PlanStep) -> Hashable:
+    """Key that is equal for two steps only when they give the same output.
+
+    Steps of profiled preprocessors are never shared, so that every profile
+    counts the work of its own configuration.
+
+    Args:
+        preprocessor (SpanishPreprocess): Preprocessor that owns the step.
+        step (_PlanStep): Step of its plan.
+
+    Returns:
+        Hashable: Step name and the options it depends on.
+    """
+    if preprocessor.profile or not (step.name in _PURE_STEPS or step.name in _STEP_ATTRIBUTES):
+        return (step.name, id(preprocessor))
+    attributes = _STEP_ATTRIBUTES.get(step.name, ())
+    return (step.name,) + tuple(_hashable(getattr(preprocessor, name)) for name in attributes)
+
+
+class _Node:
+    """Step of the tree, with the configurations whose plan ends there."""
+
+    __slots__ = ("step", "children", "names")
+
+    def __init__(self, step: Optional[_PlanStep] = None):
+        self.step = step
+        self.children: Dict[Hashable, _Node] = {}
+        self.names: List[str] = []
+
+
+class MultiPreprocess:
+    """Apply several preprocessing configurations to the same texts, sharing common steps."""
+
+    def __init__(self, configs: Dict[str, Union[dict, SpanishPreprocess]]):
+        """Init class.
+
+        Args:
+            configs (dict): Name of each configuration to its SpanishPreprocess
+                constructor options, or to a SpanishPreprocess.
+        """
+        if not configs:
+            raise ValueError("At least one configuration is required.")
+        self.preprocessors = {
+            name: config if isinstance(config, SpanishPreprocess) else SpanishPreprocess(**config)
+            for name, config in configs.items()
+        }
+        self._root = _Node()
+        total = 0
+        for name, preprocessor in self.preprocessors.items():
+            node = self._root
+            for step in preprocessor._plan:
+                key = step_key(preprocessor, step)
+                if key not in node.children:
+                    node.children[key] = _Node(step)
+                node = node.children[key]
+            node.names.append(name)
+            total += len(preprocessor._plan)
+        self.n_steps = self._count_steps_(self._root)
+        logger.info("Fan-out of %d configurations runs %d steps instead of %d", len(configs), self.n_steps, total)
+
+    def _count_steps_(self, node: _Node) -> int:
+        return sum(1 + self._count_steps_(child) for child in node.children.values())
+
+    def transform(self, text: str) -> Dict[str, str]:
+        """Transform a text with every configuration.
+
+        Args:
+            text (str): Input text to transform
+
+        Returns:
+            dict: Configuration name to its transformed text, identical to the
+            transform of its preprocessor.
+        """
+        outputs = {}
+        stack = [(self._root, text)]
+        while stack:
+            node, value = stack.pop()
+            for name in node.names:
+                outputs[name] = value
+            for child in node.children.values():
+                stack.append((child, child.step.func(value)))
+        return {name: outputs[name] for name in self.preprocessors}
+
+    def transform_batch(self, texts: Iterable[str]) -> Dict[str, List[str]]:
+        """Transform many texts with every configuration, preserving their order.
+
+        Identical texts are transformed only once. Caches of the preprocessors
+        are not used.
+
+        Args:
+            texts (iterable of str): Texts to transform.
+
+        Returns:
+            dict: Configuration name to the list of its transformed texts, in
+            the same order as the input.
+        """
+        texts = list(texts)
+        unique_texts = list(dict.fromkeys(texts))
+        outputs = {}
+        stack = [(self._root, unique_texts)]
+        while stack:
+            node, values = stack.pop()
+            for name in node.names:
+                outputs[name] = values
+            for child in node.children.values():
+                step = child.step
+                if step.batch is not None:
+                    transformed = step.batch(values)
+                else:
+                    transformed = [step.func(value) for value in values]
+                stack.append((child, transformed))
+
+        if len(unique_texts) == len(texts):
+            return {name: outputs[name] for name in self.preprocessors}
+        positions = {text: i for i, text in enumerate(unique_texts)}
+        indices = [positions[text] for text in texts]
+        return {name: [outputs[name][i] for i in indices] for name in self.preprocessors}
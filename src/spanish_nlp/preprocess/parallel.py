@@ -0,0 +1,89 @@
+"""
+Process pool used by SpanishPreprocess to transform batches in parallel.
+
+Workers never receive a pickled SpanishPreprocess: each one builds its own
+preprocessor once, from the constructor options, when the pool starts.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Preprocessor owned by the current worker process
+_worker_preprocessor = None
+
+
+def _init_worker(config: Dict[str, Any]) -> None:
+    """Build the worker preprocessor from the constructor options."""
+    global _worker_preprocessor
+    from .preprocess import SpanishPreprocess
+
+    _worker_preprocessor = SpanishPreprocess(**config)
+
+
+def _transform_chunk(texts: List[str], stop: Optional[int] = None) -> List[str]:
+    """Transform a chunk of texts inside a worker."""
+    return _worker_preprocessor._transform_many_(texts, stop)
+
+
+def resolve_n_jobs(n_jobs: int) -> int:
+    """Translate n_jobs into a number of worker processes.
+
+    Args:
+        n_jobs (int): Number of workers. -1 uses all CPUs but one.
+
+    Returns:
+        int: Number of worker processes (at least 1).
+    """
+    if n_jobs == -1:
+        n_jobs = max(1, (os.cpu_count() or 1) - 1)
+    if n_jobs < 1:
+        raise ValueError("n_jobs must be a positive integer or -1.")
+    return n_jobs
+
+
+class PreprocessPool:
+    """Long-lived pool of worker processes sharing one preprocessing configuration."""
+
+    def __init__(self, config: Dict[str, Any], n_jobs: int):
+        """Start the worker processes.
+
+        Args:
+            config (dict): SpanishPreprocess constructor options.
+            n_jobs (int): Number of worker processes.
+        """
+        self.n_jobs = n_jobs
+        self._executor = ProcessPoolExecutor(
+            max_workers=n_jobs, initializer=_init_worker, initargs=(config,)
+        )
+        logger.info("Started preprocessing pool with %d workers", n_jobs)
+
+    def map(
+        self, texts: List[str], chunksize: Optional[int] = None, stop: Optional[int] = None
+    ) -> List[str]:
+        """Transform texts in the workers, preserving the input order.
+
+        Args:
+            texts (list): Texts to transform.
+            chunksize (int, optional): Texts sent to a worker at a time. By default
+                the texts are split in about four chunks per worker.
+            stop (int, optional): Only run the steps of the plan before this index.
+                Defaults to None (every step).
+
+        Returns:
+            list: Transformed texts, in the same order as the input.
+        """
+        if chunksize is None:
+            chunksize = max(1, -(-len(texts) // (self.n_jobs * 4)))
+        chunks = [texts[i : i + chunksize] for i in range(0, len(texts), chunksize)]
+        results = []
+        for transformed in self._executor.map(_transform_chunk, chunks, [stop] * len(chunks)):
+            results.extend(transformed)
+        return results
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        self._executor.shutdown()
@@ -1,14 +1,189 @@
+import asyncio
+import os
 import re
-import string
 import logging
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
 import emoji
-from nltk.stem.snowball import SnowballStemmer
 
+from spanish_nlp.preprocess.batching import AsyncBatcher
+from spanish_nlp.preprocess.cache import config_fingerprint, text_key
+from spanish_nlp.preprocess.parallel import PreprocessPool, resolve_n_jobs
+from spanish_nlp.preprocess.profiling import (
+    StepProfile,
+    StepTrace,
+    format_report,
+    profile_batch,
+    profile_func,
+    profile_gate,
+)
+from spanish_nlp.preprocess.spans import SENTINEL_FIRST, SENTINEL_LAST, SENTINEL_RANGE, SpanProtector
+from spanish_nlp.preprocess.stream import iter_buffers, read_records
+from spanish_nlp.utils.char_table import VOWEL_ACCENTS_TABLE, CharacterTable
 from spanish_nlp.utils.emo_unicode import demoticonize, emoticonize
-from spanish_nlp.utils.inclusive_words import normalize_inclusive_language
+from spanish_nlp.utils.markup import strip_html
+from spanish_nlp.utils.regex_engine import check_engine, compile_pattern
+from spanish_nlp.utils.inclusive_words import InclusiveLanguageNormalizer, normalize_inclusive_language
+from spanish_nlp.utils.segmentation import segment_word
+from spanish_nlp.utils.spam import (
+    reduce_repeated_phrase_tokens,
+    reduce_repeated_phrases,
+    reduce_repeated_word_tokens,
+    reduce_repeated_words,
+)
+from spanish_nlp.utils.stemming import stem_tokens
+from spanish_nlp.utils.stopwords import fold_stopwords, get_stopwords
 
 logger = logging.getLogger(__name__)
 
+_URL_PATTERN = re.compile(r"https?://\S+")
+_NUMBER_PATTERN = re.compile(r"\d+")
+_HASHTAG_PATTERN = re.compile(r"#\w+")
+_HASHTAG_AFTER_SPACE_PATTERN = re.compile(r"(?<!\S)#(\w+)")
+_HASHTAG_WORDS_PATTERN = re.compile(
+    r"[A-ZÑÁÉIÓÚ]*[a-zñáéíóúü0-9]+|\d+|[A-ZÑÁÉIÓÚ]+(?![a-zñáéíóúü])"
+)
+_DIGIT_PATTERN = re.compile(r"\d")
+# Punctuation is replaced by a space and the resulting runs of spaces are
+# collapsed, so both substitutions are folded into a single pass.
+_PUNCTUATION_PATTERN = re.compile(r"(?:[^\w\sáéíóúüñÁÉÍÓÚÜÑ]| )+")
+_PROTECTED_PUNCTUATION_PATTERN = re.compile(rf"(?:[^\w\sáéíóúüñÁÉÍÓÚÜÑ{SENTINEL_RANGE}]| )+")
+_MULTIPLE_SPACES_PATTERN = re.compile(" +")
+_BREAKLINES_PATTERN = re.compile(r"(\n\s*)+")
+# A run of spaces before punctuation. The lookbehind makes every match start
+# at the first space of a run: without it, re rescans a long run of spaces
+# from each of its spaces, in quadratic time.
+_SPACE_BEFORE_PUNCTUATION = r" +([\.\,\!\?\)\]\}\>\:\#}])"
+_SPACE_BEFORE_PUNCTUATION_PATTERN = re.compile(r"(?<! )" + _SPACE_BEFORE_PUNCTUATION)
+_SPACE_AFTER_PUNCTUATION_PATTERN = re.compile(r"([\¡\¿\(\[\{\<])\: +")
+_MISSING_SPACE_PATTERN = re.compile(r"([\.\,])([^\s\d])")
+_REDUPLICATION_PATTERN = re.compile(r"([aeiou])\1+")
+# Characters that the punctuation spelling patterns start from
+_SPELLING_CHAR_PATTERN = re.compile(r"[.,!?)\]}>:#¡¿(\[{<]")
+# Shared by the single-step _remove_unprintable_ method
+_UNPRINTABLE_TABLE = CharacterTable(remove_unprintable=True)
+
+# Fused removal passes. Each one gives exactly the same result as running
+# the single steps one after another:
+# - Markup and digit runs never overlap: markup is always consumed from its
+#   "<" or "&" before the digits inside it are reached, and strip_html removes
+#   the digits of decoded references, as the numbers step would afterwards.
+# - Removing digits can glue "#" to a word ("#1a" -> "#a"), so a hashtag is
+#   removed whenever its word run contains a non-digit character. A bare
+#   "#123" keeps its "#", as it does when numbers are removed first.
+_NUMBER_OR_HASHTAG_PATTERN = re.compile(r"#(?=\d*[^\W\d])\w+|\d+")
+
+# Patterns that the steps apply to whole texts, compiled with the regex engine
+# of each preprocessor
+_TEXT_PATTERNS = {
+    "url": _URL_PATTERN,
+    "number": _NUMBER_PATTERN,
+    "hashtag": _HASHTAG_PATTERN,
+    "hashtag_after_space": _HASHTAG_AFTER_SPACE_PATTERN,
+    "punctuation": _PUNCTUATION_PATTERN,
+    "protected_punctuation": _PROTECTED_PUNCTUATION_PATTERN,
+    "multiple_spaces": _MULTIPLE_SPACES_PATTERN,
+    "breaklines": _BREAKLINES_PATTERN,
+    "space_before_punctuation": _SPACE_BEFORE_PUNCTUATION_PATTERN,
+    "space_after_punctuation": _SPACE_AFTER_PUNCTUATION_PATTERN,
+    "missing_space": _MISSING_SPACE_PATTERN,
+    "reduplication": _REDUPLICATION_PATTERN,
+    "number_or_hashtag": _NUMBER_OR_HASHTAG_PATTERN,
+}
+
+HASHTAG_CACHE_SIZE = 100_000
+# Steps that split the text on whitespace and join their output words with
+# single spaces, so that token mode can start with them
+_SPLITTING_STEPS = ("_stem_", "_remove_stopwords_")
+# Constructor options that do not change the output of a transformation
+_UNKEYED_OPTIONS = ("profile", "async_n_jobs", "async_batch_size", "async_max_in_flight")
+
+
+@lru_cache(maxsize=None)
+def _compile_text_patterns(engine: str) -> Dict[str, Any]:
+    return {name: compile_pattern(pattern, engine) for name, pattern in _TEXT_PATTERNS.items()}
+
+
+@lru_cache(maxsize=HASHTAG_CACHE_SIZE)
+def _split_hashtag(hashtag: str, segment: bool) -> Optional[str]:
+    """Split the body of a hashtag into words joined by spaces.
+
+    Camel case and digit boundaries are used first. With segment, hashtags
+    without any boundary (e.g. "vivanlospinguinos") are split into
+    dictionary words when possible.
+
+    Returns:
+        str or None: The words, or None when the hashtag contains digits and must
+        be left as it is.
+    """
+    if _DIGIT_PATTERN.search(hashtag):
+        return None
+    words = _HASHTAG_WORDS_PATTERN.findall(hashtag)
+    if segment and words == [hashtag]:
+        words = segment_word(hashtag) or words
+    return " ".join(words).strip()
+
+
+def _same_tokens(words: List[str]) -> List[str]:
+    return words
+
+
+# Step gates: cheap checks that are False only when the step would return
+# the text unchanged, so the step can be skipped.
+def _has_edge_space(text: str) -> bool:
+    return text[:1].isspace() or text[-1:].isspace()
+
+
+def _may_have_hashtags(text: str) -> bool:
+    return "#" in text or "  " in text or _has_edge_space(text)
+
+
+def _may_have_urls(text: str) -> bool:
+    return "http" in text or "  " in text
+
+
+def _may_have_markup(text: str) -> bool:
+    return "<" in text or "&" in text
+
+
+def _is_not_ascii(text: str) -> bool:
+    return not text.isascii()
+
+
+def _may_have_delimited_names(text: str) -> bool:
+    return "__" in text
+
+
+def _may_have_multiple_spaces(text: str) -> bool:
+    return "  " in text or _has_edge_space(text)
+
+
+def _may_have_breaklines(text: str) -> bool:
+    return "\n" in text or "\r" in text or _has_edge_space(text)
+
+
+def _may_need_spelling(text: str) -> bool:
+    return "  " in text or _has_edge_space(text) or _SPELLING_CHAR_PATTERN.search(text) is not None
+
+
+def _may_have_reduplications(text: str) -> bool:
+    return "aa" in text or "ee" in text or "ii" in text or "oo" in text or "uu" in text
+
+
+class _PlanStep(NamedTuple):
+    """A single pass of the compiled preprocessing plan."""
+
+    name: str
+    func: Callable[[str], str]
+    # Optional list-to-list version used when transforming many texts
+    batch: Optional[Callable[[List[str]], List[str]]] = None
+    # Optional version that takes and returns the words of a text whose words
+    # are separated by single spaces, used to run word-level steps in token mode
+    tokens: Optional[Callable[[List[str]], List[str]]] = None
+    # Optional cheap check that is False when the step cannot change the text
+    gate: Optional[Callable[[str], bool]] = None
+
 
 class SpanishPreprocess:
     def __init__(
@@ -35,9 +210,27 @@ class SpanishPreprocess:
         lemmatize=False,
         stem=False,
         remove_html_tags=True,
+        normalize_fancy_letters=False,
+        protect_spans=False,
+        inclusive_words=None,
+        lemmatize_batch_size=256,
+        lemmatize_n_process=1,
+        lemma_cache_size=0,
+        cache=None,
+        profile=False,
+        segment_hashtags=False,
+        spam_max_length=None,
+        async_n_jobs=1,
+        async_batch_size=64,
+        async_max_in_flight=4096,
+        regex_engine="re",
     ):
         """A class for preprocessing Spanish text for NLP tasks.
 
+        The enabled steps are compiled into an execution plan when the
+        instance is created. Assigning an option attribute afterwards (for
+        example ``sp.lower = False``) rebuilds the plan.
+
         Args:
             lower (bool, optional): convert text to lowercase. Defaults to True.
             remove_url (bool, optional): remove urls from text. Defaults to True.
@@ -56,37 +249,143 @@ class SpanishPreprocess:
             remove_unprintable (bool, optional): remove unprintable characters. Defaults to True.
             remove_numbers (bool, optional): remove numbers. Defaults to True.
             remove_stopwords (bool, optional): remove stopwords. Defaults to False.
-            stopwords_list (str, list, optional): stopwords name ('default', 'extended', 'nltk', 'spacy') or list of stopwords. Defaults to None.
+            stopwords_list (str, list, optional): stopwords name ('default', 'extended', 'nltk', 'spacy'), several names joined with '+' (e.g. 'extended+nltk') or list of stopwords. Defaults to None.
             lemmatize (bool, optional): lemmatize text. Defaults to False.
             stem (bool, optional): stem text. Defaults to False.
-            remove_html_tags (bool, optional): remove html tags. Defaults to True.
+            remove_html_tags (bool, optional): remove html tags, comments, scripts and styles, and decode html entities (&amp;, &#241;...). Defaults to True.
+            normalize_fancy_letters (bool, optional): fold styled Unicode letters (e.g. 𝓣𝓮𝔁𝓽𝓸) to plain letters. Defaults to False.
+            protect_spans (bool, optional): when emojis or emoticons are kept, hide them from the other steps instead of converting them to text and back. Defaults to False.
+            inclusive_words (dict, optional): extra inclusive-language words and their replacements, added to the default dictionary. Defaults to None.
+            lemmatize_batch_size (int, optional): texts per spaCy batch when lemmatizing many texts. Defaults to 256.
+            lemmatize_n_process (int, optional): spaCy processes used when lemmatizing many texts. Defaults to 1.
+            lemma_cache_size (int, optional): maximum number of words kept in the word to lemma memo. Words in the memo skip the spaCy pipeline, which makes their lemma independent of the context. 0 disables the memo. Defaults to 0.
+            cache (TransformCache, optional): cache of transformed texts, e.g. LRUCache or SQLiteCache. Entries are keyed by the other options and the text, so a cache can be shared by preprocessors with different options. Defaults to None.
+            profile (bool, optional): record calls, wall time and characters in and out of every step, see profile_report. Defaults to False.
+            segment_hashtags (bool, optional): when splitting hashtags, split the ones without camel case (e.g. #vivanlospinguinos) into dictionary words. Defaults to False.
+            spam_max_length (int, optional): texts longer than this many characters are left as they are by reduce_spam and remove_reduplications. Both steps run in linear time; the limit bounds their cost on huge inputs. Defaults to None (no limit).
+            async_n_jobs (int, optional): worker processes used by transform_async and transform_batch_async, as n_jobs in transform_batch. Defaults to 1 (a single background thread).
+            async_batch_size (int, optional): maximum number of queued texts that transform_async and transform_batch_async transform together. Defaults to 64.
+            async_max_in_flight (int, optional): maximum number of texts queued or being transformed by transform_async and transform_batch_async; further calls wait. Defaults to 4096.
+            regex_engine (str, optional): engine of the regular expressions applied to whole texts: "re" (Python) or "re2" (google-re2, linear time on any input; patterns with lookarounds or backreferences stay on re). Defaults to "re".
+        """
+        # Constructor options, used to rebuild the preprocessor in worker processes
+        self._config = {
+            key: value for key, value in locals().items() if key not in ("self", "cache")
+        }
+        self._pool = None
+        self._batcher = None
+        self.cache = cache
+        self._profiles: Dict[str, StepProfile] = {}
+        self._lemma_memo: Dict[str, str] = {}
+        self._configure_()
+
+    def __setattr__(self, name, value):
+        # Options assigned after construction rebuild everything derived from them
+        if name in self.__dict__.get("_config", ()) and not self.__dict__.get("_configuring", True):
+            self._reconfigure_(name, value)
+        else:
+            super().__setattr__(name, value)
+
+    def _reconfigure_(self, name, value):
+        """Set an option and rebuild the plan, the cache key and the workers."""
+        previous = self._config
+        self._config = {**previous, name: value}
+        try:
+            self._configure_(check=False)
+        except Exception:
+            self._config = previous
+            self._configure_(check=False)
+            raise
+        # The workers were started with the previous options
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        if name.startswith("async_") and self._batcher is not None:
+            self._batcher.close()
+            self._batcher = None
+
+    def _configure_(self, check=True):
+        """Set the option attributes from the constructor options and build the plan.
+
+        Args:
+            check (bool, optional): raise an error for exclusive options. Options
+                assigned after construction are not checked, so they can be
+                changed one at a time. Defaults to True.
         """
-        self.lower = lower
-        self.remove_url = remove_url
-        self.remove_hashtags = remove_hashtags
-        self.split_hashtags = split_hashtags
-        self.normalize_breaklines = normalize_breaklines
-        self.remove_emojis = remove_emojis
-        self.remove_emoticons = remove_emoticons
-        self.convert_emoticons = convert_emoticons
-        self.convert_emojis = convert_emojis
-        self.normalize_inclusive_language = normalize_inclusive_language
-        self.reduce_spam = reduce_spam
-        self.remove_reduplications = remove_reduplications
-        self.remove_vowels_accents = remove_vowels_accents
-        self.remove_multiple_spaces = remove_multiple_spaces
-        self.remove_punctuation = remove_punctuation
-        self.remove_numbers = remove_numbers
-        self.remove_stopwords = remove_stopwords
-        self._prepare_stopwords_(stopwords_list)
-        self.remove_unprintable = remove_unprintable
-        self.stem = stem
-        self.lemmatize = lemmatize
-        self.remove_html_tags = remove_html_tags
+        self._configuring = True
+        config = self._config
+        # Profiling and scheduling do not change the output, so they do not change the cache keys
+        self._fingerprint = config_fingerprint(
+            {key: value for key, value in config.items() if key not in _UNKEYED_OPTIONS}
+        )
+        self.profile = config["profile"]
+        self.lower = config["lower"]
+        self.remove_url = config["remove_url"]
+        self.remove_hashtags = config["remove_hashtags"]
+        self.split_hashtags = config["split_hashtags"]
+        self.segment_hashtags = config["segment_hashtags"]
+        self.normalize_breaklines = config["normalize_breaklines"]
+        self.remove_emojis = config["remove_emojis"]
+        self.remove_emoticons = config["remove_emoticons"]
+        self.convert_emoticons = config["convert_emoticons"]
+        self.convert_emojis = config["convert_emojis"]
+        self.normalize_inclusive_language = config["normalize_inclusive_language"]
+        self.inclusive_words = config["inclusive_words"]
+        self.reduce_spam = config["reduce_spam"]
+        self.remove_reduplications = config["remove_reduplications"]
+        self.spam_max_length = config["spam_max_length"]
+        self.async_n_jobs = resolve_n_jobs(config["async_n_jobs"])
+        self.async_batch_size = config["async_batch_size"]
+        self.async_max_in_flight = config["async_max_in_flight"]
+        check_engine(config["regex_engine"])
+        self.regex_engine = config["regex_engine"]
+        self._patterns = _compile_text_patterns(self.regex_engine)
+        self.remove_vowels_accents = config["remove_vowels_accents"]
+        self.remove_multiple_spaces = config["remove_multiple_spaces"]
+        self.remove_punctuation = config["remove_punctuation"]
+        self.remove_numbers = config["remove_numbers"]
+        self.remove_stopwords = config["remove_stopwords"]
+        self._prepare_stopwords_(config["stopwords_list"])
+        self.remove_unprintable = config["remove_unprintable"]
+        self.stem = config["stem"]
+        self.lemmatize = config["lemmatize"]
+        self.lemmatize_batch_size = config["lemmatize_batch_size"]
+        self.lemmatize_n_process = config["lemmatize_n_process"]
+        self.lemma_cache_size = config["lemma_cache_size"]
+        self.remove_html_tags = config["remove_html_tags"]
+        self.normalize_fancy_letters = config["normalize_fancy_letters"]
+        self.protect_spans = config["protect_spans"]
         self.normalize_punctuation_spelling = True
 
-        self._check_errors_()
-        self._prepare_lemmatize_()
+        if check:
+            self._check_errors_()
+        if "nlp_spacy" not in self.__dict__:
+            self._prepare_lemmatize_()
+        self._char_table = CharacterTable(
+            strip_accents=self.remove_vowels_accents,
+            remove_unprintable=self.remove_unprintable,
+            fold_fancy_letters=self.normalize_fancy_letters,
+            lower=self.lower,
+        )
+        self._inclusive_normalizer = (
+            InclusiveLanguageNormalizer(self.inclusive_words)
+            if self.normalize_inclusive_language
+            else None
+        )
+        self._span_protector = SpanProtector(
+            emojis=not self.remove_emojis, emoticons=not self.remove_emoticons
+        )
+        self._protected_char_table = CharacterTable(
+            strip_accents=self.remove_vowels_accents,
+            remove_unprintable=self.remove_unprintable,
+            fold_fancy_letters=self.normalize_fancy_letters,
+            lower=self.lower,
+            keep_range=(SENTINEL_FIRST, SENTINEL_LAST),
+        )
+        self._plan = self._build_plan_()
+        # Profiles keep one entry per step, so profiled plans are not fused
+        self._token_plan = self._plan if self.profile else self._fuse_token_steps_(self._plan)
+        self._configuring = False
 
     def _check_errors_(self):
         if self.lemmatize and self.stem:
@@ -104,40 +403,16 @@ class SpanishPreprocess:
             )
 
     def _prepare_stopwords_(self, type="default"):
-        if type == "default":
-            from spanish_nlp.utils.stopwords import default_stopwords
-
-            self.stopwords_list = default_stopwords
-
-        elif type == "extended":
-            from spanish_nlp.utils.stopwords import extended_stopwords
-
-            self.stopwords_list = extended_stopwords
-
-        elif type == "nltk":
-            import nltk
-
-            nltk.download("stopwords")
-            from nltk.corpus import stopwords
-
-            self.stopwords_list = stopwords.words("spanish")
-        elif type == "spacy":
-            import es_core_news_sm
-
-            nlp = es_core_news_sm.load(disable=["ner", "parser", "tagger", "textcat", "vectors"])
-            self.stopwords_list = nlp.Defaults.stop_words
-            del nlp
-
-        elif type is None:
+        if type is None:
             self.stopwords_list = None
-
+        elif isinstance(type, str):
+            self.stopwords_list = get_stopwords(type)
+        elif isinstance(type, (list, tuple, set, frozenset)):
+            self.stopwords_list = fold_stopwords(type)
         else:
-            if isinstance(type, list):
-                self.stopwords_list = type
-            else:
-                raise ValueError(
-                    "Stopwords must be a list or one of the following: 'default', 'extended', 'nltk', 'spacy'"
-                )
+            raise ValueError(
+                "Stopwords must be a list or one of the following: 'default', 'extended', 'nltk', 'spacy'"
+            )
 
     def _prepare_lemmatize_(self, force=False):
         if self.lemmatize or force:
@@ -156,68 +431,75 @@ class SpanishPreprocess:
         "Este es un texto con una url: https://www.google.com" -> "Este es un texto con una url: "
         "Una URL como http://page.com/page/test?param=1&param2=2 tiene parámetros" -> "Una URL como tiene parámetros"
         """
-        url_pattern = re.compile(r"https?://\S+")
-        text = url_pattern.sub("", text).replace("  ", " ")
-        return text
+        return self._patterns["url"].sub("", text).replace("  ", " ")
 
     def _remove_hashtags_(self, text):
         """Remove hashtags from text. By example:
         "Este es un texto con un hashtag: #hashtag" -> "Este es un texto con un hashtag:"
         "Tengo un #hashtag1 #HashTag2 y #hasTag3" -> "Tengo un y"
         """
-        return re.sub(r"#\w+", "", text).strip().replace("  ", " ")
+        return self._patterns["hashtag"].sub("", text).strip().replace("  ", " ")
 
     def _split_hashtags_(self, text):
         """Split hashtags from text.
         Example:
             "este es #unEjemplo de #TextosConHashtag #SiSeñor #yey." -> "este es un Ejemplo de Textos Con Hashtag Si Señor yey."
         """
-        # Find all hashtags
-        hashtags = re.findall(r"(?<=\s)#(\w+)", text)
-        # Delete hashtag with numbers
-        hashtags = [ht for ht in hashtags if not re.search(r"\d", ht)]
-        # Split all hashtags and replace them in the text
-        pattern = re.compile(r"[A-ZÑÁÉIÓÚ]*[a-zñáéíóúü0-9]+|\d+|[A-ZÑÁÉIÓÚ]+(?![a-zñáéíóúü])")
-        for ht in hashtags:
-            words = " ".join(pattern.findall(ht)).strip()
-            text = text.replace(f"#{ht}", f"{words}")
-        return text.replace("  ", " ").strip()
+        segment = self.segment_hashtags
+
+        def split(match):
+            words = _split_hashtag(match.group(1), segment)
+            return match.group(0) if words is None else words
+
+        return self._patterns["hashtag_after_space"].sub(split, text).replace("  ", " ").strip()
 
     def _normalize_breaklines_(self, text):
         """Convert multiple breaklines to one breakline"""
         text = text.replace("\r", "\n")
         # text = re.sub(r"(\n){2,}", r"\n", text)
         # Can there are 0 or more spaces between breaklines
-        text = re.sub(r"(\n\s*)+", r"\n", text)
+        text = self._patterns["breaklines"].sub("\n", text)
         return text.strip()
 
     def _emoticons_to_text_(self, text):
-        pp_text = demoticonize(text, delimiters=(" __", "__ "))
+        pp_text = demoticonize(text, delimiters=(" __", "__ "), engine=self.regex_engine)
         return self._normalize_punctuation_spelling_(pp_text)
 
     def _emojis_to_text_(self, text):
-        pp_text = emoji.demojize(text, delimiters=(" __", "__ ")).replace("  ", " ")
+        # Every emoji has a non-ASCII character
+        if not text.isascii():
+            text = emoji.demojize(text, delimiters=(" __", "__ "))
+        pp_text = text.replace("  ", " ")
         return self._normalize_punctuation_spelling_(pp_text)
 
     def _text_to_emojis_(self, text):
-        pp_text = emoji.emojize(text, delimiters=("__", "__"))
-        return self._normalize_punctuation_spelling_(pp_text)
+        if "__" in text:
+            text = emoji.emojize(text, delimiters=("__", "__"))
+        return self._normalize_punctuation_spelling_(text)
 
     def _text_to_emoticons_(self, text):
-        pp_text = emoticonize(text, delimiters=("__", "__"))
+        pp_text = emoticonize(text, delimiters=("__", "__"), engine=self.regex_engine)
         return pp_text
 
     def _normalize_inclusive_language_(self, text):
         """Replace inclusive language with a dictionary of some words"""
-        return normalize_inclusive_language(text)
+        if self._inclusive_normalizer is None:
+            return normalize_inclusive_language(text, self.inclusive_words)
+        return self._inclusive_normalizer.normalize(text)
 
     def _reduce_spam_(self, text):
         """Reduce a expression if it is repeated more than 3 times and convert it to two expressions.
         Example: "hola hola hola hola hola hola" -> "hola hola hola"
         """
-        text = re.sub(r"(\w+\s)\1+", r"\1\1", text)
-        text = re.sub(r"(\b(\w+\s){3})\1+", r"\1\1", text)
-        return text
+        if self.spam_max_length is not None and len(text) > self.spam_max_length:
+            return text
+        return reduce_repeated_phrases(reduce_repeated_words(text))
+
+    def _reduce_spam_tokens_(self, words):
+        """Token mode version of _reduce_spam_"""
+        if self.spam_max_length is not None and sum(map(len, words)) + len(words) - 1 > self.spam_max_length:
+            return words
+        return reduce_repeated_phrase_tokens(reduce_repeated_word_tokens(words))
 
     def _remove_reduplications_(self, text):
         """Use a regular expression to find a sequence of non-digit characters
@@ -227,173 +509,686 @@ class SpanishPreprocess:
         Examples: "holaaa cómo estás?" -> "hola cómo estás?"
                   "no te creoooo naaada" -> "no te creo naaada"
         """
-        pattern = r"([aeiou])\1+"
-        return re.sub(pattern, r"\1", text)
+        if self.spam_max_length is not None and len(text) > self.spam_max_length:
+            return text
+        return self._patterns["reduplication"].sub(r"\1", text)
 
     def _remove_vowels_accents_(self, text):
         """Convert vowels with accents from text (lowercase or uppercase)"""
-        text = re.sub(r"[áàäâ]", "a", text)
-        text = re.sub(r"[éèëê]", "e", text)
-        text = re.sub(r"[íìïî]", "i", text)
-        text = re.sub(r"[óòöô]", "o", text)
-        text = re.sub(r"[úùüû]", "u", text)
-        text = re.sub(r"[ÁÀÄÂ]", "A", text)
-        text = re.sub(r"[ÉÈËÊ]", "E", text)
-        text = re.sub(r"[ÍÌÏÎ]", "I", text)
-        text = re.sub(r"[ÓÒÖÔ]", "O", text)
-        text = re.sub(r"[ÚÙÜÛ]", "U", text)
-        return text
+        return text.translate(VOWEL_ACCENTS_TABLE)
 
     def _remove_punctuation_(self, text):
-        pattern = re.compile(r"[^\w\sáéíóúüñÁÉÍÓÚÜÑ]")
-        t = pattern.sub(r" ", text)
-        return re.sub(" +", " ", t)
+        return self._patterns["punctuation"].sub(" ", text)
 
     def _remove_unprintable_(self, text):
-        printable = set(string.printable + "ñáéíóúü" + "ÑÁÉÍÓÚÜ")
-        text = "".join(filter(lambda x: x in printable, text))
-        return text
+        return _UNPRINTABLE_TABLE.translate(text)
+
+    def _normalize_characters_(self, text):
+        """Strip vowel accents, remove unprintable characters and fold fancy letters
+        in a single pass, as configured"""
+        return self._char_table.translate(text)
+
+    def _remove_punctuation_protected_(self, text):
+        """Remove punctuation, keeping the sentinels of protected spans"""
+        return self._patterns["protected_punctuation"].sub(" ", text)
+
+    def _normalize_characters_protected_(self, text):
+        """Normalize characters, keeping the sentinels of protected spans"""
+        return self._protected_char_table.translate(text)
+
+    def _transform_protected_(self, steps, fallback, text):
+        """Run steps with emojis and emoticons swapped for sentinel characters.
+
+        The spans are restored with a single substitution afterwards. Texts that
+        cannot be protected go through the usual text round trip (fallback).
+        """
+        protected = self._span_protector.protect(text)
+        if protected is None:
+            for step in fallback:
+                text = step.func(text)
+            return text
+
+        text, spans = protected
+        text = self._normalize_punctuation_spelling_(text)
+        for step in steps:
+            text = step.func(text)
+        return self._span_protector.restore(text, spans)
 
     def _remove_numbers_(self, text):
         """Remove numbers from text"""
-        return re.sub(r"\d+", "", text)
+        return self._patterns["number"].sub("", text)
 
     def _convert_numbers_(self, text, delimiters=(" __", "__ ")):
         return re.sub(r"[0-9]", delimiters[0] + "numero" + delimiters[1], text)
 
     def _remove_stopwords_(self, text):
-        return " ".join(
-            [word for word in str(text).split() if word.lower() not in self.stopwords_list]
-        )
+        return " ".join(self._remove_stopwords_tokens_(str(text).split()))
+
+    def _remove_stopwords_tokens_(self, words):
+        return [word for word in words if word.lower() not in self.stopwords_list]
 
-    def _stem_(self, text, stemmer=SnowballStemmer("spanish")):
-        """TODO: add another stemmers"""
+    def _stem_(self, text, stemmer=None):
+        """Stem every word with the shared Snowball stem cache, or with the given stemmer"""
+        if stemmer is None:
+            return " ".join(stem_tokens(text.split()))
         return " ".join([stemmer.stem(word) for word in text.split()])
 
     def _lemmatize_(self, text, lemmatizer="es_core_news_sm"):
         """Lemmatize text using es_core_news_sm from spacy by default"""
-        doc = self.nlp_spacy(text)
-        return " ".join([token.lemma_ for token in doc])
+        lemmas = self._memo_lemmas_(text)
+        if lemmas is None:
+            doc = self.nlp_spacy(text)
+            lemmas = " ".join([token.lemma_ for token in doc])
+            self._remember_lemmas_(text, doc)
+        return lemmas
+
+    def _lemmatize_batch_(self, texts: List[str]) -> List[str]:
+        """Lemmatize many texts, feeding the ones not covered by the memo through nlp.pipe."""
+        results = [self._memo_lemmas_(text) for text in texts]
+        pending = [i for i, lemmas in enumerate(results) if lemmas is None]
+        docs = self.nlp_spacy.pipe(
+            (texts[i] for i in pending),
+            batch_size=self.lemmatize_batch_size,
+            n_process=self.lemmatize_n_process,
+        )
+        for i, doc in zip(pending, docs):
+            results[i] = " ".join([token.lemma_ for token in doc])
+            self._remember_lemmas_(texts[i], doc)
+        return results
+
+    def _memo_lemmas_(self, text: str) -> Optional[str]:
+        """Lemmatize a text from the memo, or return None if any word is missing."""
+        if not self.lemma_cache_size:
+            return None
+        words = text.split()
+        if not self._is_plain_(text, words):
+            return None
+        try:
+            return " ".join([self._lemma_memo[word] for word in words])
+        except KeyError:
+            return None
+
+    @staticmethod
+    def _is_plain_(text: str, words: List[str]) -> bool:
+        """Whether the words of a text are separated by single spaces.
+
+        Other whitespace becomes spaCy tokens of its own, so only these texts
+        can be lemmatized word by word. A single trailing space is allowed.
+        """
+        joined = " ".join(words)
+        return text == joined or text == joined + " "
+
+    def _remember_lemmas_(self, text: str, doc) -> None:
+        """Store the lemmas of every whitespace-separated word of a lemmatized text."""
+        if not self.lemma_cache_size or not self._is_plain_(text, text.split()):
+            return
+        memo = self._lemma_memo
+        start, lemmas = 0, []
+        for token in doc:
+            lemmas.append(token.lemma_)
+            if token.whitespace_ or token.i == len(doc) - 1:
+                word = text[start : token.idx + len(token)]
+                if word not in memo:
+                    if len(memo) >= self.lemma_cache_size:
+                        del memo[next(iter(memo))]
+                    memo[word] = " ".join(lemmas)
+                start, lemmas = token.idx + len(token) + 1, []
 
     def _remove_multiples_spaces_(self, text):
-        return re.sub(" +", " ", text).strip()
+        return self._patterns["multiple_spaces"].sub(" ", text).strip()
 
     def _normalize_punctuation_spelling_(self, text):
         """Remove all wrong spaces with punctuation"""
         # Remove spaces before punctuation
-        text = re.sub(r" +([\.\,\!\?\)\]\}\>\:\#}])", r"\1", text)
+        text = self._patterns["space_before_punctuation"].sub(r"\1", text)
         # Remove spaces after punctuation
-        text = re.sub(r"([\¡\¿\(\[\{\<])\: +", r"\1", text)
+        text = self._patterns["space_after_punctuation"].sub(r"\1", text)
         # Add space after , and . if it is not a number or an url and it does not have a space
-        text = re.sub(r"([\.\,])([^\s\d])", r"\1 \2", text)
+        text = self._patterns["missing_space"].sub(r"\1 \2", text)
         # Remove duplicated spaces
         return self._remove_multiples_spaces_(text).strip()
 
+    def _normalize_punctuation_spelling_tokens_(self, words):
+        """Token mode version of _normalize_punctuation_spelling_, which leaves
+        words made of letters and digits as they are"""
+        if all(word.isalnum() for word in words):
+            return words
+        return self._normalize_punctuation_spelling_(" ".join(words)).split()
+
     def _remove_html_tags_(self, text):
-        """Remove html tags from a string"""
-        import re
+        """Remove html tags, comments, scripts and styles and decode entities in a single pass.
+        Example: "<p>Pingüinos &amp; ñandúes</p>" -> "Pingüinos & ñandúes"
+        """
+        return strip_html(text, lower=self.lower)
+
+    def _remove_html_tags_and_numbers_(self, text):
+        """Remove html markup and numbers in a single pass"""
+        return strip_html(text, lower=self.lower, remove_numbers=True)
+
+    def _remove_numbers_and_hashtags_(self, text):
+        """Remove numbers and hashtags in a single pass"""
+        return self._patterns["number_or_hashtag"].sub("", text).strip().replace("  ", " ")
+
+    def _build_plan_(self) -> List[_PlanStep]:
+        """Compile the enabled options into the ordered list of passes run by transform.
 
-        clean = re.compile("<.*?>")
-        return re.sub(clean, "", text)
+        Adjacent removals are fused into a single pass when the combined
+        pattern is equivalent to running them one after another.
+
+        Returns:
+            List[_PlanStep]: Steps in execution order.
+        """
+        steps = self._build_steps_()
+        if self.protect_spans and (not self.remove_emojis or not self.remove_emoticons):
+            steps = self._protect_segment_(steps)
+        if self.profile:
+            steps = self._profile_steps_(steps)
+        return steps
+
+    def _fuse_token_steps_(self, steps: List[_PlanStep]) -> List[_PlanStep]:
+        """Run consecutive word-level steps in token mode.
+
+        From a step that splits the text on whitespace, the following steps
+        with a token version run on the list of words, and the text is joined
+        once at the end of the run instead of being split and joined (or
+        scanned for spaces) by every step.
+
+        Args:
+            steps (List[_PlanStep]): Steps of the plan.
+
+        Returns:
+            List[_PlanStep]: Steps where each run is a single step named after its steps.
+        """
+        fused = []
+        i = 0
+        while i < len(steps):
+            end = i + 1
+            if steps[i].name in _SPLITTING_STEPS:
+                while end < len(steps) and steps[end].tokens is not None:
+                    end += 1
+            run = steps[i:end]
+            if len(run) == 1:
+                fused.append(steps[i])
+            else:
+                name = "+".join(step.name for step in run)
+                funcs = [step.tokens for step in run]
+                fused.append(_PlanStep(name, partial(self._transform_tokens_, funcs)))
+            i = end
+        return fused
+
+    @staticmethod
+    def _transform_tokens_(funcs, text):
+        """Split a text once, run token versions of steps on its words and join them once."""
+        words = text.split()
+        for func in funcs:
+            words = func(words)
+        return " ".join(words)
+
+    def _profile_steps_(self, steps: List[_PlanStep]) -> List[_PlanStep]:
+        """Wrap every step so that it records its calls, time and characters."""
+        profiled = []
+        for step in steps:
+            profile = self._profiles.setdefault(step.name, StepProfile())
+            batch = profile_batch(step.batch, profile) if step.batch is not None else None
+            gate = profile_gate(step.gate, profile) if step.gate is not None else None
+            profiled.append(
+                step._replace(func=profile_func(step.func, profile), batch=batch, gate=gate)
+            )
+        return profiled
+
+    def _protect_segment_(self, steps: List[_PlanStep]) -> List[_PlanStep]:
+        """Replace the emoji and emoticon text round trip with a protected segment.
+
+        Args:
+            steps (List[_PlanStep]): Steps with the round trip.
+
+        Returns:
+            List[_PlanStep]: Steps where everything from the conversion to text up to
+            the restoration runs inside a single _protect_spans_ step.
+        """
+        to_text = ("_emojis_to_text_", "_emoticons_to_text_")
+        from_text = ("_text_to_emojis_", "_text_to_emoticons_")
+        protected_variants = {
+            "_remove_punctuation_": self._remove_punctuation_protected_,
+            "_normalize_characters_": self._normalize_characters_protected_,
+        }
+        names = [step.name for step in steps]
+        start = min(names.index(name) for name in to_text if name in names)
+        end = max(names.index(name) for name in from_text if name in names)
+
+        fallback = steps[start : end + 1]
+        segment = [
+            _PlanStep(step.name, protected_variants.get(step.name, step.func))
+            for step in fallback
+            if step.name not in to_text + from_text
+        ]
+        protected = _PlanStep(
+            "_protect_spans_", partial(self._transform_protected_, segment, fallback)
+        )
+        return steps[:start] + [protected] + steps[end + 1 :]
+
+    def _build_steps_(self) -> List[_PlanStep]:
+        """List the steps enabled by the options, fusing adjacent removals."""
+        steps = []
+
+        def add(name, func, batch=None, tokens=None, gate=None):
+            steps.append(_PlanStep(name, func, batch, tokens, gate))
+
+        if self.split_hashtags:
+            add("_split_hashtags_", self._split_hashtags_, gate=_may_have_hashtags)
+        if self.lower:
+            add("_lower_", self._lower_)
+        if self.remove_url:
+            add("_remove_url_", self._remove_url_, gate=_may_have_urls)
+
+        if self.remove_html_tags and self.remove_numbers:
+            add("_remove_html_tags_+_remove_numbers_", self._remove_html_tags_and_numbers_)
+            if self.remove_hashtags:
+                add("_remove_hashtags_", self._remove_hashtags_, gate=_may_have_hashtags)
+        elif self.remove_numbers and self.remove_hashtags:
+            add("_remove_numbers_+_remove_hashtags_", self._remove_numbers_and_hashtags_)
+        else:
+            if self.remove_html_tags:
+                add("_remove_html_tags_", self._remove_html_tags_, gate=_may_have_markup)
+            if self.remove_numbers:
+                add("_remove_numbers_", self._remove_numbers_)
+            if self.remove_hashtags:
+                add("_remove_hashtags_", self._remove_hashtags_, gate=_may_have_hashtags)
+
+        if self.stem:
+            add("_stem_", self._stem_, tokens=stem_tokens)
+        if self.lemmatize:
+            add("_lemmatize_", self._lemmatize_, self._lemmatize_batch_)
+        if self.convert_emojis or not self.remove_emojis:
+            add("_emojis_to_text_", self._emojis_to_text_)
+        if self.convert_emoticons or not self.remove_emoticons:
+            add("_emoticons_to_text_", self._emoticons_to_text_)
+        if self.normalize_inclusive_language:
+            add("_normalize_inclusive_language_", self._normalize_inclusive_language_)
+        if self.remove_punctuation:
+            add("_remove_punctuation_", self._remove_punctuation_)
+        # Accent stripping maps letters to letters, so it commutes with the
+        # punctuation step and can share the character table pass that
+        # removes unprintable characters afterwards.
+        if self.remove_vowels_accents or self.remove_unprintable or self.normalize_fancy_letters:
+            # ASCII text only changes when unprintable control characters are removed
+            gate = None if self._char_table.ascii_table else _is_not_ascii
+            add("_normalize_characters_", self._normalize_characters_, gate=gate)
+        if not self.remove_emojis:
+            add("_text_to_emojis_", self._text_to_emojis_)
+        if not self.remove_emoticons:
+            add("_text_to_emoticons_", self._text_to_emoticons_, gate=_may_have_delimited_names)
+        if self.remove_stopwords:
+            add("_remove_stopwords_", self._remove_stopwords_, tokens=self._remove_stopwords_tokens_)
+        # Words separated by single spaces have no runs of spaces or breaklines
+        if self.remove_multiple_spaces:
+            add(
+                "_remove_multiples_spaces_",
+                self._remove_multiples_spaces_,
+                tokens=_same_tokens,
+                gate=_may_have_multiple_spaces,
+            )
+        if self.normalize_breaklines:
+            add(
+                "_normalize_breaklines_",
+                self._normalize_breaklines_,
+                tokens=_same_tokens,
+                gate=_may_have_breaklines,
+            )
+        if self.normalize_punctuation_spelling:
+            add(
+                "_normalize_punctuation_spelling_",
+                self._normalize_punctuation_spelling_,
+                tokens=self._normalize_punctuation_spelling_tokens_,
+                gate=_may_need_spelling,
+            )
+        if self.reduce_spam:
+            add("_reduce_spam_", self._reduce_spam_, tokens=self._reduce_spam_tokens_)
+        if self.remove_reduplications:
+            add("_remove_reduplications_", self._remove_reduplications_, gate=_may_have_reduplications)
+        return steps
 
     def transform(self, text):
         """Transform input text by applying the configured preprocessing steps.
-        
+
         Args:
             text (str): Input text to transform
-            
+
         Returns:
             str: Transformed text with all preprocessing steps applied
         """
-        logger.debug("Starting text transformation")
-        
-        if self.split_hashtags:
-            text = self._split_hashtags_(text)
-            logger.debug("Split hashtags: %s", text)
+        if self.cache is None:
+            return self._apply_plan_(text)
+        key = text_key(self._fingerprint, text)
+        transformed = self.cache.get(key)
+        if transformed is None:
+            transformed = self._apply_plan_(text)
+            self.cache.set(key, transformed)
+        return transformed
+
+    def _apply_plan_(self, text):
+        """Run every step of the plan on a single text, skipping the ones whose gate fails."""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Starting text transformation")
+            for trace in self._trace_(text):
+                logger.debug("%s: %s", trace.step, "skipped" if trace.skipped else trace.text)
+                text = trace.text
+            logger.debug("Text transformation complete")
+            return text
+
+        for step in self._token_plan:
+            if step.gate is None or step.gate(text):
+                text = step.func(text)
+        return text
 
-        if self.lower:
-            text = self._lower_(text)
-            logger.debug("Lowercase: %s", text)
+    def _trace_(self, text: str) -> Iterator[StepTrace]:
+        """Run the plan step by step, yielding what every step did."""
+        for step in self._plan:
+            skipped = step.gate is not None and not step.gate(text)
+            if not skipped:
+                text = step.func(text)
+            yield StepTrace(step.name, skipped, text)
 
-        if self.remove_url:
-            text = self._remove_url_(text)
-            logger.debug("Remove URLs: %s", text)
+    def transform_with_trace(self, text: str) -> Tuple[str, List[StepTrace]]:
+        """Transform a text and report what every step of the plan did.
 
-        if self.remove_html_tags:
-            text = self._remove_html_tags_(text)
-            logger.debug("Remove HTML tags: %s", text)
+        Steps run one by one, even the ones that transform joins in token mode,
+        and the cache is not used.
 
-        if self.remove_numbers:
-            text = self._remove_numbers_(text)
-            logger.debug("Remove numbers: %s", text)
+        Args:
+            text (str): Input text to transform
 
-        if self.remove_hashtags:
-            text = self._remove_hashtags_(text)
-            logger.debug("Remove hashtags: %s", text)
+        Returns:
+            tuple: The transformed text, identical to transform, and one StepTrace
+            (step name, whether its gate skipped it, text after the step) per step.
+        """
+        trace = list(self._trace_(text))
+        return (trace[-1].text if trace else text), trace
 
-        if self.stem:
-            text = self._stem_(text)
-            logger.debug("Stem: %s", text)
+    def _transform_many_(self, texts: List[str], stop: Optional[int] = None) -> List[str]:
+        """Transform a list of texts in the current process.
 
-        if self.lemmatize:
-            text = self._lemmatize_(text)
-            logger.debug("Lemmatize: %s", text)
+        The plan runs step by step over the whole list, so steps with a batch
+        version (lemmatization) process all the texts at once. With stop, only
+        the steps before that index of the plan are run.
+        """
+        texts = list(texts)
+        for step in self._token_plan if stop is None else self._plan[:stop]:
+            if step.batch is not None:
+                texts = step.batch(texts)
+            elif step.gate is not None:
+                texts = [step.func(text) if step.gate(text) else text for text in texts]
+            else:
+                texts = [step.func(text) for text in texts]
+        return texts
 
-        if self.convert_emojis or not self.remove_emojis:
-            text = self._emojis_to_text_(text)
-            logger.debug("Emojis to text: %s", text)
+    def profile_stats(self) -> Dict[str, Dict[str, float]]:
+        """Return the counters recorded by profile=True, per step.
 
-        if self.convert_emoticons or not self.remove_emoticons:
-            text = self._emoticons_to_text_(text)
-            logger.debug("Emoticons to text: %s", text)
+        Only the transformations run in this process are counted; work done by
+        the transform_batch worker pool is not.
 
-        if self.normalize_inclusive_language:
-            text = self._normalize_inclusive_language_(text)
-            logger.debug("Normalize inclusive language: %s", text)
+        Returns:
+            dict: Step name to its calls, texts, skipped (texts passed over by
+            the step gate), seconds, chars_in and chars_out, in plan order.
+            Empty when profiling is disabled.
+        """
+        return {name: profile.as_dict() for name, profile in self._profiles.items()}
 
-        if self.remove_vowels_accents:
-            text = self._remove_vowels_accents_(text)
-            logger.debug("Remove vowel accents: %s", text)
+    def profile_report(self) -> str:
+        """Format the profile_stats counters as a table sorted by time.
 
-        if self.remove_punctuation:
-            text = self._remove_punctuation_(text)
-            logger.debug("Remove punctuation: %s", text)
+        Returns:
+            str: Report with one line per step.
+        """
+        if not self.profile:
+            raise RuntimeError("Profiling is disabled. Create the preprocessor with profile=True.")
+        return format_report(self._profiles)
 
-        if self.remove_unprintable:
-            text = self._remove_unprintable_(text)
-            logger.debug("Remove unprintable: %s", text)
+    def reset_profile(self) -> None:
+        """Set every profiling counter back to zero."""
+        for profile in self._profiles.values():
+            profile.reset()
 
-        if not self.remove_emojis:
-            text = self._text_to_emojis_(text)
-            logger.debug("Text to emojis: %s", text)
+    def get_config(self) -> Dict:
+        """Return the constructor options of this preprocessor, except the cache.
 
-        if not self.remove_emoticons:
-            text = self._text_to_emoticons_(text)
-            logger.debug("Text to emoticons: %s", text)
+        Returns:
+            dict: Keyword arguments that rebuild an equivalent SpanishPreprocess.
+        """
+        return dict(self._config)
 
-        if self.remove_stopwords:
-            text = self._remove_stopwords_(text)
-            logger.debug("Remove stopwords: %s", text)
+    def transform_batch(
+        self, texts: Iterable[str], n_jobs: int = 1, chunksize: Optional[int] = None
+    ) -> List[str]:
+        """Transform many texts, optionally in parallel, preserving their order.
 
-        if self.remove_multiple_spaces:
-            text = self._remove_multiples_spaces_(text).strip()
-            logger.debug("Remove multiple spaces: %s", text)
+        Identical texts are transformed only once per batch, and texts found in
+        the cache are not transformed at all. With n_jobs > 1 the texts are sent
+        to a pool of worker processes that is kept alive between calls; each
+        worker builds its own preprocessor from get_config().
 
-        if self.normalize_breaklines:
-            text = self._normalize_breaklines_(text)
-            logger.debug("Normalize breaklines: %s", text)
+        Args:
+            texts (iterable of str): Texts to transform.
+            n_jobs (int, optional): Number of worker processes. 1 runs in the current
+                process and -1 uses all CPUs but one. Defaults to 1.
+            chunksize (int, optional): Texts sent to a worker at a time. Defaults to None.
 
-        if self.normalize_punctuation_spelling:
-            text = self._normalize_punctuation_spelling_(text)
-            logger.debug("Normalize punctuation spelling: %s", text)
+        Returns:
+            list: Transformed texts, in the same order as the input.
+        """
+        texts = list(texts)
+        unique_texts = list(dict.fromkeys(texts))
+        n_jobs = resolve_n_jobs(n_jobs)
 
-        if self.reduce_spam:
-            text = self._reduce_spam_(text)
-            logger.debug("Reduce spam: %s", text)
+        if self.cache is None:
+            transformed = self._transform_unique_(unique_texts, n_jobs, chunksize)
+        else:
+            keys = [text_key(self._fingerprint, text) for text in unique_texts]
+            transformed = self.cache.get_many(keys)
+            missing = [i for i, value in enumerate(transformed) if value is None]
+            computed = self._transform_unique_([unique_texts[i] for i in missing], n_jobs, chunksize)
+            for i, value in zip(missing, computed):
+                transformed[i] = value
+            self.cache.set_many([(keys[i], value) for i, value in zip(missing, computed)])
+
+        if len(unique_texts) == len(texts):
+            return transformed
+        results = dict(zip(unique_texts, transformed))
+        return [results[text] for text in texts]
+
+    def transform_chunked(self, text: str, chunk_size: int = 1_000_000, n_jobs: int = 1) -> str:
+        """Transform a very large text in chunks, with the same output as transform.
+
+        The text is cut at line breaks between two plain words, at least
+        chunk_size characters apart, and the chunks are transformed one after
+        another (or n_jobs at a time in the worker pool), so the intermediate
+        copies made by each step are the size of a chunk instead of the size of
+        the text. Texts that are short, that use lemmatization, protect_spans
+        or spam_max_length, or where a repeated word or phrase crosses a break
+        are transformed in one piece.
 
-        if self.remove_reduplications:
-            text = self._remove_reduplications_(text)
-            logger.debug("Remove reduplications: %s", text)
+        Args:
+            text (str): Text to transform.
+            chunk_size (int, optional): Minimum size of each chunk in characters.
+                Defaults to 1000000.
+            n_jobs (int, optional): Number of worker processes, as in transform_batch.
+                Defaults to 1.
 
-        logger.debug("Text transformation complete")
-        return text
+        Returns:
+            str: Transformed text, identical to transform(text).
+        """
+        from spanish_nlp.preprocess.chunking import transform_chunked
+
+        return transform_chunked(self, text, chunk_size, resolve_n_jobs(n_jobs))
+
+    def transform_arrow(self, array):
+        """Transform a pyarrow string column with vectorized kernels.
+
+        Steps with an RE2 equivalent run as pyarrow.compute kernels over the whole
+        column; the rest (stemming, lemmatization, emojis, accents...) run in
+        Python on the rows. The cache is not used.
+
+        Args:
+            array (pyarrow.Array or pyarrow.ChunkedArray): string or large_string column.
+
+        Returns:
+            pyarrow.Array or pyarrow.ChunkedArray: Transformed column of the same type.
+        """
+        from spanish_nlp.preprocess.arrow import transform_arrow
+
+        return transform_arrow(self, array)
+
+    def transform_pandas(self, series):
+        """Transform a pandas Series of strings through transform_arrow.
+
+        Args:
+            series (pandas.Series): Strings, optionally backed by Arrow.
+
+        Returns:
+            pandas.Series: Transformed strings with the same index and name.
+        """
+        from spanish_nlp.preprocess.arrow import transform_pandas
+
+        return transform_pandas(self, series)
+
+    def transform_polars(self, series):
+        """Transform a polars Series of strings through transform_arrow.
+
+        Args:
+            series (polars.Series): Strings.
+
+        Returns:
+            polars.Series: Transformed strings with the same name.
+        """
+        from spanish_nlp.preprocess.arrow import transform_polars
+
+        return transform_polars(self, series)
+
+    def _transform_unique_(self, texts: List[str], n_jobs: int, chunksize: Optional[int]) -> List[str]:
+        """Transform distinct texts in this process or in the worker pool."""
+        if n_jobs == 1 or len(texts) < 2:
+            return self._transform_many_(texts)
+        return self._get_pool_(n_jobs).map(texts, chunksize)
+
+    def _get_pool_(self, n_jobs: int) -> PreprocessPool:
+        """Return the worker pool, starting it (again) when n_jobs changes."""
+        if self._pool is None or self._pool.n_jobs != n_jobs:
+            self.close()
+            self._pool = PreprocessPool(self.get_config(), n_jobs)
+        return self._pool
+
+    async def transform_async(self, text: str) -> str:
+        """Transform a text without blocking the event loop.
+
+        The text is queued and transformed in a background thread (or in the
+        worker pool when async_n_jobs > 1). Texts queued by concurrent calls
+        while a batch is running are transformed together in the next batch.
+
+        Args:
+            text (str): Input text to transform
+
+        Returns:
+            str: Transformed text, identical to transform(text).
+        """
+        return (await self._get_batcher_().transform([text]))[0]
+
+    async def transform_batch_async(self, texts: Iterable[str]) -> List[str]:
+        """Transform many texts without blocking the event loop, preserving their order.
+
+        The texts share the queue of transform_async, so they may be batched
+        together with the texts of concurrent calls.
+
+        Args:
+            texts (iterable of str): Texts to transform.
+
+        Returns:
+            list: Transformed texts, in the same order as the input.
+        """
+        return await self._get_batcher_().transform(list(texts))
+
+    def _get_batcher_(self) -> AsyncBatcher:
+        """Return the batcher of the running event loop, creating it when the loop changes."""
+        if self._batcher is None or self._batcher.loop is not asyncio.get_running_loop():
+            if self._batcher is not None:
+                self._batcher.close()
+            self._batcher = AsyncBatcher(
+                self, self.async_n_jobs, self.async_batch_size, self.async_max_in_flight
+            )
+        return self._batcher
+
+    def transform_stream(
+        self,
+        source: Union[str, os.PathLike, Iterable[Any]],
+        format: Optional[str] = None,
+        text_field: str = "text",
+        buffer_size: int = 1000,
+        n_jobs: int = 1,
+        encoding: str = "utf-8",
+    ) -> Iterator[Any]:
+        """Lazily transform the records of a file or an iterable, preserving their order.
+
+        Records are read ahead buffer_size at a time and each buffer goes through
+        transform_batch, so memory stays bounded by the buffer whatever the size
+        of the input.
+
+        Args:
+            source (str, PathLike or iterable): Path to a JSONL, CSV or newline-delimited
+                text file, or an iterable of strings or dicts.
+            format (str, optional): 'jsonl', 'csv' or 'txt' when source is a path.
+                Inferred from the file extension when None. Defaults to None.
+            text_field (str, optional): Field holding the text in dict records
+                (JSONL objects and CSV rows). Defaults to 'text'.
+            buffer_size (int, optional): Number of records read ahead. Defaults to 1000.
+            n_jobs (int, optional): Worker processes used for each buffer, as in
+                transform_batch. Defaults to 1.
+            encoding (str, optional): File encoding. Defaults to 'utf-8'.
+
+        Yields:
+            str or dict: Transformed strings for text records, or a copy of each dict
+            record with its text field transformed. Non-string values are left as is.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            records = read_records(source, format=format, encoding=encoding)
+        else:
+            records = source
+
+        for buffer in iter_buffers(records, buffer_size):
+            texts = []
+            for record in buffer:
+                value = record.get(text_field) if isinstance(record, dict) else record
+                if isinstance(value, str):
+                    texts.append(value)
+            transformed = iter(self.transform_batch(texts, n_jobs=n_jobs))
+
+            for record in buffer:
+                if isinstance(record, dict):
+                    if isinstance(record.get(text_field), str):
+                        record = dict(record)
+                        record[text_field] = next(transformed)
+                    yield record
+                elif isinstance(record, str):
+                    yield next(transformed)
+                else:
+                    yield record
+
+    def close(self):
+        """Shut down the worker pool and the thread started by transform_async, if any."""
+        if self._batcher is not None:
+            self._batcher.close()
+            self._batcher = None
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        state["_batcher"] = None
+        return state
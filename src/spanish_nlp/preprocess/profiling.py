@@ -0,0 +1,110 @@
+"""
+Per-step instrumentation for SpanishPreprocess(profile=True).
+
+Profiled preprocessors wrap every step of their plan so that calls, wall time,
+characters in and out and texts skipped by the step gate are accumulated per
+step. Preprocessors without profiling keep their plain plan and pay nothing.
+"""
+
+import time
+from typing import Dict, List, NamedTuple
+
+
+class StepTrace(NamedTuple):
+    """What one step of the plan did to a text, as reported by transform_with_trace."""
+
+    step: str
+    skipped: bool
+    text: str
+
+
+class StepProfile:
+    """Counters accumulated for one step of the plan."""
+
+    __slots__ = ("calls", "texts", "skipped", "seconds", "chars_in", "chars_out")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Set every counter back to zero."""
+        self.calls = 0
+        self.texts = 0
+        self.skipped = 0
+        self.seconds = 0.0
+        self.chars_in = 0
+        self.chars_out = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def profile_func(func, profile: StepProfile):
+    """Wrap a text-to-text step so that it updates profile."""
+
+    def timed(text):
+        start = time.perf_counter()
+        result = func(text)
+        profile.seconds += time.perf_counter() - start
+        profile.calls += 1
+        profile.texts += 1
+        profile.chars_in += len(text)
+        profile.chars_out += len(result)
+        return result
+
+    return timed
+
+
+def profile_gate(gate, profile: StepProfile):
+    """Wrap the gate of a step so that it counts the texts it skips."""
+
+    def counted(text):
+        if gate(text):
+            return True
+        profile.skipped += 1
+        return False
+
+    return counted
+
+
+def profile_batch(batch, profile: StepProfile):
+    """Wrap a list-to-list step so that it updates profile."""
+
+    def timed(texts):
+        start = time.perf_counter()
+        results = batch(texts)
+        profile.seconds += time.perf_counter() - start
+        profile.calls += 1
+        profile.texts += len(texts)
+        profile.chars_in += sum(map(len, texts))
+        profile.chars_out += sum(map(len, results))
+        return results
+
+    return timed
+
+
+def format_report(profiles: Dict[str, StepProfile]) -> str:
+    """Format the profiles as a table sorted by cumulative time.
+
+    Args:
+        profiles (dict): Step name to StepProfile.
+
+    Returns:
+        str: One line per step with calls, texts, skipped texts, total and
+        per-text time, share of the total time and characters in and out.
+    """
+    total = sum(profile.seconds for profile in profiles.values()) or 1.0
+    lines: List[str] = [
+        (
+            f"{'step':<40} {'calls':>8} {'texts':>9} {'skipped':>9} {'total s':>9} {'us/text':>9} "
+            f"{'%':>6} {'chars in':>12} {'chars out':>12}"
+        )
+    ]
+    for name, profile in sorted(profiles.items(), key=lambda item: -item[1].seconds):
+        per_text = profile.seconds / profile.texts * 1e6 if profile.texts else 0.0
+        lines.append(
+            f"{name:<40} {profile.calls:>8} {profile.texts:>9} {profile.skipped:>9} "
+            f"{profile.seconds:>9.4f} {per_text:>9.1f} {100 * profile.seconds / total:>6.1f} "
+            f"{profile.chars_in:>12} {profile.chars_out:>12}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,81 @@
+"""
+Protected spans: keep emojis and emoticons untouched while other steps run.
+
+Each protected span is swapped for a single sentinel character from the
+Supplementary Private Use Area-A (U+F0000 to U+FFFFD) whose code point
+indexes the original span. Steps must leave these characters alone; the
+originals are put back with one substitution at the end.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+import emoji
+
+from spanish_nlp.utils.emo_unicode import replace_emoticons
+
+SENTINEL_FIRST = 0xF0000
+SENTINEL_LAST = 0xFFFFD
+# Character class range to exclude sentinels from patterns
+SENTINEL_RANGE = "\U000F0000-\U000FFFFD"
+
+_SENTINEL_PATTERN = re.compile(f"[{SENTINEL_RANGE}]")
+
+
+class SpanProtector:
+    """Swap emojis and emoticons for sentinel characters and restore them later."""
+
+    def __init__(self, emojis: bool = True, emoticons: bool = True):
+        """Init class.
+
+        Args:
+            emojis (bool, optional): protect emojis. Defaults to True.
+            emoticons (bool, optional): protect emoticons. Defaults to True.
+        """
+        self.emojis = emojis
+        self.emoticons = emoticons
+
+    def protect(self, text: str) -> Optional[Tuple[str, List[str]]]:
+        """Replace each emoji and emoticon with a sentinel surrounded by spaces.
+
+        Args:
+            text (str): Input text.
+
+        Returns:
+            tuple or None: The protected text and the original spans, or None when
+            the text already contains sentinel characters or has too many spans.
+        """
+        if _SENTINEL_PATTERN.search(text):
+            return None
+        spans: List[str] = []
+
+        def sentinel(span, *_):
+            if len(spans) > SENTINEL_LAST - SENTINEL_FIRST:
+                # Out of sentinels: keep counting so the text is rejected below
+                spans.append(span)
+                return span
+            spans.append(span)
+            return f" {chr(SENTINEL_FIRST + len(spans) - 1)} "
+
+        if self.emojis and not text.isascii():
+            text = emoji.replace_emoji(text, replace=sentinel).replace("  ", " ")
+        if self.emoticons:
+            text = replace_emoticons(text, sentinel)
+        if len(spans) > SENTINEL_LAST - SENTINEL_FIRST + 1:
+            return None
+        return text, spans
+
+    @staticmethod
+    def restore(text: str, spans: List[str]) -> str:
+        """Put the original spans back in place of their sentinels.
+
+        Args:
+            text (str): Text returned by protect, after any other steps.
+            spans (list): Spans returned by protect.
+
+        Returns:
+            str: Text with the original emojis and emoticons.
+        """
+        if not spans:
+            return text
+        return _SENTINEL_PATTERN.sub(lambda match: spans[ord(match.group()) - SENTINEL_FIRST], text)
@@ -0,0 +1,85 @@
+"""
+Record readers used by SpanishPreprocess.transform_stream.
+
+Files are read lazily, one record at a time, so a stream never holds more
+than its read-ahead buffer in memory.
+"""
+
+import csv
+import json
+import os
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional
+
+_EXTENSION_FORMATS = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+}
+
+FORMATS = ("jsonl", "csv", "txt")
+
+
+def infer_format(path: str) -> str:
+    """Guess the record format from a file extension.
+
+    Args:
+        path (str): Path of the input file.
+
+    Returns:
+        str: 'jsonl', 'csv' or 'txt' (newline-delimited text, the fallback).
+    """
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension == ".json":
+        raise ValueError(f"Cannot infer the format of {path}: pass format='jsonl' for a JSON Lines file.")
+    return _EXTENSION_FORMATS.get(extension, "txt")
+
+
+def read_records(path: str, format: Optional[str] = None, encoding: str = "utf-8") -> Iterator[Any]:
+    """Lazily read the records of a JSONL, CSV or newline-delimited text file.
+
+    Args:
+        path (str): Path of the input file.
+        format (str, optional): 'jsonl', 'csv' or 'txt'. Inferred from the extension
+            when None. Defaults to None.
+        encoding (str, optional): File encoding. Defaults to 'utf-8'.
+
+    Yields:
+        dict or str: Parsed JSON objects and CSV rows as dicts, text lines as str.
+    """
+    format = format or infer_format(path)
+    if format not in FORMATS:
+        raise ValueError(f"Format must be one of: {', '.join(FORMATS)}")
+
+    with open(path, encoding=encoding, newline="" if format == "csv" else None) as f:
+        if format == "csv":
+            yield from csv.DictReader(f)
+        elif format == "jsonl":
+            first = True
+            for line in f:
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError as error:
+                        if first:
+                            raise ValueError(
+                                f"{path} is not JSON Lines (one JSON value per line); is it a JSON document?"
+                            ) from error
+                        raise
+                    first = False
+                    yield record
+        else:
+            for line in f:
+                yield line[:-1] if line.endswith("\n") else line
+
+
+def iter_buffers(records: Iterable[Any], buffer_size: int) -> Iterator[List[Any]]:
+    """Group records into lists of at most buffer_size items."""
+    if buffer_size < 1:
+        raise ValueError("buffer_size must be a positive integer.")
+    records = iter(records)
+    while True:
+        buffer = list(islice(records, buffer_size))
+        if not buffer:
+            return
+        yield buffer
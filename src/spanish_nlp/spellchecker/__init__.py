@@ -1,17 +1,31 @@
+import importlib
 import logging
 from typing import List, Optional, Union
 
 from .base import SpellCheckerBase
-from .dictionary_impl import DictionarySpellChecker
-from .contextual_lm_impl import ContextualLMSpellChecker # Added back
 
 logger = logging.getLogger(__name__)
 
+# Implementations are imported when first used: the contextual one loads torch
 _IMPLEMENTATIONS = {
-    'dictionary': DictionarySpellChecker,
-    'contextual_lm': ContextualLMSpellChecker, # Added back
+    'dictionary': ('.dictionary_impl', 'DictionarySpellChecker'),
+    'contextual_lm': ('.contextual_lm_impl', 'ContextualLMSpellChecker'), # Added back
 }
 
+
+def _load_implementation(method: str):
+    module_name, class_name = _IMPLEMENTATIONS[method]
+    return getattr(importlib.import_module(module_name, __name__), class_name)
+
+
+def __getattr__(name):
+    for method, (_, class_name) in _IMPLEMENTATIONS.items():
+        if name == class_name:
+            value = _load_implementation(method)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 class SpanishSpellChecker:
     """
     Main facade for Spanish spell checking.
@@ -36,9 +50,7 @@ class SpanishSpellChecker:
                       For 'dictionary': distance, custom_dictionary.
                       For 'contextual_lm': model_name, device, top_k, suggestion_distance_threshold.
         """
-        implementation_class = _IMPLEMENTATIONS.get(method.lower())
-
-        if not implementation_class:
+        if method.lower() not in _IMPLEMENTATIONS:
             available = ", ".join(_IMPLEMENTATIONS.keys())
             raise ValueError(
                 f"Spell checking method '{method}' not recognized. "
@@ -47,6 +59,8 @@ class SpanishSpellChecker:
 
         logger.info(f"Initializing SpanishSpellChecker with method: '{method}'")
 
+        implementation_class = _load_implementation(method.lower())
+
         if 'language' not in kwargs:
              kwargs['language'] = language
 
@@ -2,6 +2,12 @@ from abc import ABC, abstractmethod
 import re
 from typing import List, Tuple, Set
 
+from spanish_nlp.utils.regex_engine import compile_pattern
+
+# A run of word characters or a run of other characters. Runs are maximal, so
+# every word match is already delimited by word boundaries.
+_TOKEN_PATTERN = re.compile(r'(\w+)|(\W+)')
+
 class SpellCheckerBase(ABC):
     """
     Abstract Base Class for spell checker implementations.
@@ -9,12 +15,16 @@ class SpellCheckerBase(ABC):
     Defines the common interface that all spell checkers must adhere to.
     """
 
-    def __init__(self, **kwargs):
+    def __init__(self, regex_engine: str = "re", **kwargs):
         """
         Base initializer. Can be used for common setup.
         Accepts arbitrary keyword arguments for subclass flexibility.
+
+        Args:
+            regex_engine (str, optional): Engine of the tokenizer pattern, "re" or
+                "re2" (google-re2, linear time on any input). Defaults to "re".
         """
-        pass
+        self._token_pattern = compile_pattern(_TOKEN_PATTERN, regex_engine)
 
     @abstractmethod
     def is_correct(self, word: str) -> bool:
@@ -69,7 +79,7 @@ class SpellCheckerBase(ABC):
                                      if it's a word (True) or not (False).
         """
         tokens = []
-        for match in re.finditer(r'(\b\w+\b)|(\W+)', text):
+        for match in self._token_pattern.finditer(text):
             word_match = match.group(1)
             non_word_match = match.group(2)
             if word_match:
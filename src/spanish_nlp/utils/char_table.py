@@ -0,0 +1,106 @@
+"""
+Character translation table for single-pass normalization
+"""
+
+import string
+import unicodedata
+from typing import Optional, Tuple
+
+VOWEL_ACCENTS = {
+    "a": "áàäâ",
+    "e": "éèëê",
+    "i": "íìïî",
+    "o": "óòöô",
+    "u": "úùüû",
+    "A": "ÁÀÄÂ",
+    "E": "ÉÈËÊ",
+    "I": "ÍÌÏÎ",
+    "O": "ÓÒÖÔ",
+    "U": "ÚÙÜÛ",
+}
+
+VOWEL_ACCENTS_TABLE = str.maketrans(
+    {accented: vowel for vowel, group in VOWEL_ACCENTS.items() for accented in group}
+)
+
+PRINTABLE = frozenset(string.printable + "ñáéíóúü" + "ÑÁÉÍÓÚÜ")
+
+# Compatibility decompositions used by "fancy" text generators: mathematical
+# script/bold/fraktur letters, fullwidth forms and circled letters.
+FANCY_DECOMPOSITIONS = ("<font>", "<wide>", "<narrow>", "<circle>")
+
+
+class CharacterTable(dict):
+    """Translation table that strips vowel accents, removes unprintable characters
+    and folds styled Unicode letters with one str.translate call.
+
+    Non-ASCII entries are computed the first time a character is seen and cached,
+    so the table only holds the characters that actually occur in the input.
+    """
+
+    def __init__(
+        self,
+        strip_accents: bool = False,
+        remove_unprintable: bool = False,
+        fold_fancy_letters: bool = False,
+        lower: bool = False,
+        keep_range: Optional[Tuple[int, int]] = None,
+    ):
+        """Build the table.
+
+        Args:
+            strip_accents (bool, optional): replace accented vowels with plain vowels.
+                Defaults to False.
+            remove_unprintable (bool, optional): remove characters outside
+                string.printable and the Spanish letters. Defaults to False.
+            fold_fancy_letters (bool, optional): fold styled letters such as 𝓣𝓮𝔁𝓽𝓸
+                to their plain form (NFKC). Defaults to False.
+            lower (bool, optional): lowercase the folded letters. Defaults to False.
+            keep_range (tuple, optional): first and last code points that are always
+                kept as they are. Defaults to None.
+        """
+        super().__init__()
+        self.strip_accents = strip_accents
+        self.remove_unprintable = remove_unprintable
+        self.fold_fancy_letters = fold_fancy_letters
+        self.lower = lower
+        self.keep_range = keep_range
+        # Only unprintable control characters change in ASCII text
+        self.ascii_table = {
+            code: None
+            for code in range(128)
+            if remove_unprintable and chr(code) not in PRINTABLE
+        }
+
+    def __missing__(self, code: int) -> str:
+        chars = self._map_(chr(code))
+        self[code] = chars
+        return chars
+
+    def _map_(self, char: str) -> str:
+        if self.keep_range and self.keep_range[0] <= ord(char) <= self.keep_range[1]:
+            return char
+        if self.fold_fancy_letters and unicodedata.decomposition(char).startswith(
+            FANCY_DECOMPOSITIONS
+        ):
+            char = unicodedata.normalize("NFKC", char)
+            if self.lower:
+                char = char.lower()
+        if self.strip_accents:
+            char = char.translate(VOWEL_ACCENTS_TABLE)
+        if self.remove_unprintable:
+            char = "".join(c for c in char if c in PRINTABLE)
+        return char
+
+    def translate(self, text: str) -> str:
+        """Apply the table to a text in a single pass.
+
+        Args:
+            text (str): Input text.
+
+        Returns:
+            str: Normalized text.
+        """
+        if text.isascii():
+            return text.translate(self.ascii_table) if self.ascii_table else text
+        return text.translate(self)
@@ -4,6 +4,11 @@
 Emoticons and Emoji data dictonary
 """
 
+from functools import lru_cache
+
+from spanish_nlp.utils.regex_engine import compile_pattern
+from spanish_nlp.utils.trie import trie_regex
+
 EMOTICONS = {
     ":‑)": "happy_face_or_smiley_1",
     ":)": "happy_face_or_smiley_2",
@@ -233,15 +238,44 @@ EMOTICONS = {
 }
 
 
-def demoticonize(string, delimiters=(" _", "_ ")):
-    """Replace emoticons with their corresponding text in the dictionary EMOTICONS"""
+@lru_cache(maxsize=None)
+def emoticon_pattern(engine="re"):
+    """Longest-match pattern over all emoticons, compiled on first use"""
+    return compile_pattern(trie_regex(EMOTICONS), engine)
+
+
+@lru_cache(maxsize=32)
+def _emoticon_replacements(delimiters):
+    """Map each emoticon to its delimited text"""
+    return {emoticon: f"{delimiters[0]}{text}{delimiters[1]}" for emoticon, text in EMOTICONS.items()}
+
+
+@lru_cache(maxsize=32)
+def _emoticon_text_pattern(delimiters, engine="re"):
+    """Longest-match pattern over the delimited texts, and the emoticon of each one"""
+    emoticons = {}
     for emoticon, text in EMOTICONS.items():
-        string = string.replace(emoticon, f"{delimiters[0]}{text}{delimiters[1]}")
-    return string
+        # Several emoticons share a text: the first one in EMOTICONS is restored
+        emoticons.setdefault(f"{delimiters[0]}{text}{delimiters[1]}", emoticon)
+    return compile_pattern(trie_regex(emoticons), engine), emoticons
 
 
-def emoticonize(string, delimiters=(" _", "_ ")):
+def replace_emoticons(string, replace):
+    """Replace every emoticon in EMOTICONS with the result of replace(emoticon).
+
+    The text is scanned once and the longest emoticon wins at each position,
+    so ":-))" is not split into ":-)" and ")".
+    """
+    return emoticon_pattern().sub(lambda match: replace(match.group()), string)
+
+
+def demoticonize(string, delimiters=(" _", "_ "), engine="re"):
+    """Replace emoticons with their corresponding text in the dictionary EMOTICONS"""
+    replacements = _emoticon_replacements(tuple(delimiters))
+    return emoticon_pattern(engine).sub(lambda match: replacements[match.group()], string)
+
+
+def emoticonize(string, delimiters=(" _", "_ "), engine="re"):
     """Replace text in the dictionary EMOTICONS with their corresponding emoticons"""
-    for emoticon, text in EMOTICONS.items():
-        string = string.replace(f"{delimiters[0]}{text}{delimiters[1]}", emoticon)
-    return string
+    pattern, emoticons = _emoticon_text_pattern(tuple(delimiters), engine)
+    return pattern.sub(lambda match: emoticons[match.group()], string)
@@ -2,6 +2,11 @@
 Inclusive words data dictonary
 """
 
+import re
+from typing import Dict, Optional
+
+from spanish_nlp.utils.trie import trie_regex
+
 INCLUSIVE_WORDS = {
     "nosotres": "nosotros",
     "nosotrxs": "nosotros",
@@ -27,11 +32,57 @@ INCLUSIVE_WORDS = {
     "les": "los",
 }
 
-def normalize_inclusive_language(text: str) -> str:
+
+class InclusiveLanguageNormalizer:
+    """Replace inclusive-language words with a single word-boundary pass.
+
+    All entries are compiled into one trie pattern, so the cost of a pass does
+    not grow with the size of the dictionary. Entries only match whole words:
+    "les" is replaced, but not inside "tales" or "claves".
+    """
+
+    def __init__(self, words: Optional[Dict[str, str]] = None, include_default: bool = True):
+        """Compile the matcher.
+
+        Args:
+            words (dict, optional): extra entries mapping each word to its replacement.
+                They take precedence over the default ones. Defaults to None.
+            include_default (bool, optional): include INCLUSIVE_WORDS. Defaults to True.
+        """
+        self.words = dict(INCLUSIVE_WORDS) if include_default else {}
+        if words:
+            self.words.update(words)
+        self._pattern = re.compile(rf"(?<!\w)(?:{trie_regex(self.words)})(?!\w)")
+
+    def normalize(self, text: str) -> str:
+        """Replace every inclusive-language word in the text.
+
+        Args:
+            text (str): Input text.
+
+        Returns:
+            str: Normalized text.
+        """
+        return self._pattern.sub(lambda match: self.words[match.group()], text)
+
+
+_default_normalizer = None
+
+
+def normalize_inclusive_language(text: str, words: Optional[Dict[str, str]] = None) -> str:
     """
     Normalize inclusive language
+
+    Args:
+        text (str): Input text.
+        words (dict, optional): extra entries added to INCLUSIVE_WORDS. Defaults to None.
+
+    Returns:
+        str: Normalized text.
     """
-    for key, value in INCLUSIVE_WORDS.items():
-        if key in text:
-            text = text.replace(key, value)
-    return text
+    global _default_normalizer
+    if words:
+        return InclusiveLanguageNormalizer(words).normalize(text)
+    if _default_normalizer is None:
+        _default_normalizer = InclusiveLanguageNormalizer()
+    return _default_normalizer.normalize(text)
@@ -0,0 +1,164 @@
+"""
+Single-pass removal of HTML markup with entity decoding.
+
+A single pattern finds, from left to right, comments, script and style
+elements with their contents, tags, declarations and character references.
+Markup is dropped and references are decoded in the same substitution, so
+the text is copied once whatever the number of tags. Every alternative
+either matches or fails without looking past the next "<" or ">", and
+unclosed comments, scripts and styles run to the end of the text, as in a
+browser, so the scan takes linear time.
+"""
+
+import re
+from functools import lru_cache
+from html import unescape
+from typing import Optional
+
+_MARKUP_PATTERN = re.compile(
+    r"<!--.*?(?:-->|\Z)"
+    r"|<(script|style)\b.*?(?:</\1\s*>|\Z)"
+    r"|</?[a-zA-Z][^<>]*>"
+    r"|<[!?][^<>]*>"
+    r"|&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);?",
+    re.DOTALL | re.IGNORECASE,
+)
+# Markup or a run of digits, for the fused removal of tags and numbers
+_MARKUP_OR_NUMBER_PATTERN = re.compile(_MARKUP_PATTERN.pattern + r"|\d+", re.DOTALL | re.IGNORECASE)
+_NUMBER_PATTERN = re.compile(r"\d+")
+_SCRIPT_OR_STYLE_PATTERN = re.compile(r"<(script|style)\b", re.IGNORECASE)
+_CLOSING_PATTERNS = {
+    name: re.compile(rf"</{name}\s*>", re.IGNORECASE) for name in ("script", "style")
+}
+_TAG_START_PATTERN = re.compile(r"</?[a-zA-Z]|<[!?]")
+_URL_START_PATTERN = re.compile(r"https?://")
+
+
+@lru_cache(maxsize=4096)
+def _decode_reference(token: str, lower: bool, remove_numbers: bool) -> str:
+    decoded = unescape(token)
+    if decoded != token:
+        decoded = decoded.replace("\xa0", " ")
+        if lower:
+            decoded = decoded.lower()
+    if remove_numbers:
+        decoded = _NUMBER_PATTERN.sub("", decoded)
+    return decoded
+
+
+def strip_html(text: str, lower: bool = False, remove_numbers: bool = False) -> str:
+    """Remove HTML markup from a text and decode its character references.
+
+    Tags, declarations, comments and the contents of script and style elements
+    are removed. Character references (&amp;, &#241;, &#xF1;...) are decoded;
+    non-breaking spaces become plain spaces. A "<" that does not start a tag,
+    as in "a < b", is kept.
+
+    Examples:
+        "<p>Pingüinos &amp; ñandúes</p><script>x()</script>" -> "Pingüinos & ñandúes"
+
+    Args:
+        text (str): Text with markup.
+        lower (bool, optional): lowercase the decoded references, for texts that
+            were lowercased before. Defaults to False.
+        remove_numbers (bool, optional): also remove runs of digits, including the
+            ones produced by decoded references. Defaults to False.
+
+    Returns:
+        str: Text without markup.
+    """
+    if "&" not in text:
+        if "<" not in text:
+            return _NUMBER_PATTERN.sub("", text) if remove_numbers else text
+        # Without references every match is removed
+        return (_MARKUP_OR_NUMBER_PATTERN if remove_numbers else _MARKUP_PATTERN).sub("", text)
+
+    def replace(match):
+        token = match.group()
+        return _decode_reference(token, lower, remove_numbers) if token[0] == "&" else ""
+
+    pattern = _MARKUP_OR_NUMBER_PATTERN if remove_numbers else _MARKUP_PATTERN
+    return pattern.sub(replace, text)
+
+
+def _url_start(text: str, position: int, start: int) -> Optional[int]:
+    """Start of the URL (up to the next whitespace) that contains position, if any."""
+    token = position
+    while token > start and not text[token - 1].isspace():
+        token -= 1
+    url = _URL_START_PATTERN.search(text, token, position)
+    return None if url is None else url.start()
+
+
+def _rfind_outside_urls(text: str, sub: str, start: int, end: int, remove_urls: bool) -> int:
+    """Last position of sub in text[start:end] that is not inside a removed URL, or -1."""
+    position = text.rfind(sub, start, end)
+    while remove_urls and position != -1:
+        url = _url_start(text, position, start)
+        if url is None:
+            break
+        position = text.rfind(sub, start, url)
+    return position
+
+
+def open_markup(
+    text: str, start: int = 0, end: Optional[int] = None, remove_urls: bool = False
+) -> Optional[int]:
+    """Find markup of text[start:end] that would go on past end.
+
+    strip_html gives the same result on text[start:end] as on a longer text
+    unless a comment, script, style or tag started before end is still open
+    there.
+
+    Args:
+        text (str): Text with markup.
+        start (int, optional): Position where markup may start. Defaults to 0.
+        end (int, optional): Position to check. Defaults to the end of the text.
+        remove_urls (bool, optional): whether URLs are removed before the markup. Markup
+            inside a URL is then ignored, and markup followed by a URL is reported,
+            since the URL can contain the characters that close it. Defaults to False.
+
+    Returns:
+        int or None: Position of the open markup, or None when nothing is open at end.
+    """
+    end = len(text) if end is None else end
+    openings = []
+    comment = _rfind_outside_urls(text, "<!--", start, end, remove_urls)
+    if comment != -1:
+        if text.find("-->", comment + 4, end) == -1:
+            return comment
+        openings.append(comment)
+    # The last script and the last style, which are closed by different tags
+    elements = {}
+    for element in _SCRIPT_OR_STYLE_PATTERN.finditer(text, start, end):
+        if not remove_urls or _url_start(text, element.start(), start) is None:
+            elements[element.group(1).casefold()] = element
+    for name, element in elements.items():
+        if _CLOSING_PATTERNS[name].search(text, element.end(), end) is None:
+            return element.start()
+        openings.append(element.start())
+    tag = _rfind_outside_urls(text, "<", start, end, remove_urls)
+    if tag != -1:
+        if _TAG_START_PATTERN.match(text, tag, end) and text.find(">", tag, end) == -1:
+            return tag
+        openings.append(tag)
+    if remove_urls and openings and _URL_START_PATTERN.search(text, min(openings), end):
+        return min(openings)
+    return None
+
+
+def skip_markup(text: str, position: int) -> int:
+    """Position after the markup that starts at position.
+
+    Args:
+        text (str): Text with markup.
+        position (int): Start of the markup, as returned by open_markup.
+
+    Returns:
+        int: End of the markup, or the next "<" when it is a tag that is never closed.
+    """
+    match = _MARKUP_PATTERN.match(text, position)
+    if match is not None:
+        return match.end()
+    following = text.find("<", position + 1)
+    return len(text) if following == -1 else following
@@ -0,0 +1,86 @@
+"""
+Translation of Python regular expressions to RE2 syntax
+
+RE2 (used by pyarrow.compute and google-re2) has ASCII-only shorthand classes
+and no lookarounds or backreferences. to_re2 rewrites the Unicode-aware
+Python shorthands as Unicode property classes and rejects the constructs RE2
+cannot express, so callers know when they must fall back to Python's re.
+"""
+
+from typing import Optional
+
+# Python's Unicode \s: str.isspace() characters
+_SPACE = r"\t\n\v\f\r\x{1c}-\x{1f}\x{85}\p{Z}"
+# Python's Unicode \d: decimal digits
+_DIGIT = r"\p{Nd}"
+# Python's Unicode \w: str.isalnum() characters and the underscore
+_WORD = r"\p{L}\p{N}_"
+
+_CLASS_ESCAPES = {"s": _SPACE, "d": _DIGIT, "w": _WORD}
+_ASCII_PUNCTUATION = frozenset("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~")
+# Escapes with the same meaning in both engines
+_COMMON_ESCAPES = frozenset("ntrfvaAz")
+
+
+def to_re2(pattern: str) -> Optional[str]:
+    """Rewrite a Python regular expression with the same meaning in RE2 syntax.
+
+    Args:
+        pattern (str): Python pattern source.
+
+    Returns:
+        str or None: RE2 pattern, or None when the pattern uses lookarounds,
+        backreferences, word boundaries, negated shorthands inside a character
+        class, or any other construct without an RE2 equivalent.
+    """
+    out = []
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            if i + 1 == len(pattern):
+                return None
+            escaped = pattern[i + 1]
+            i += 2
+            if escaped in _CLASS_ESCAPES:
+                body = _CLASS_ESCAPES[escaped]
+                out.append(body if in_class else f"[{body}]")
+            elif escaped.lower() in _CLASS_ESCAPES:
+                if in_class:
+                    return None
+                out.append(f"[^{_CLASS_ESCAPES[escaped.lower()]}]")
+            elif escaped in _ASCII_PUNCTUATION or escaped in _COMMON_ESCAPES:
+                out.append("\\" + escaped)
+            elif not escaped.isascii() or escaped.isspace():
+                # Literal characters, as escaped by re.escape
+                out.append(escaped)
+            else:
+                # Backreferences, \b, \B, \Z, numeric and named escapes
+                return None
+            continue
+
+        if in_class:
+            if char == "]" and not _is_class_start(out):
+                in_class = False
+            out.append(char)
+        elif char == "[":
+            in_class = True
+            out.append(char)
+            if pattern.startswith("^", i + 1):
+                out.append("^")
+                i += 1
+        elif char == "(" and pattern.startswith("?", i + 1):
+            # Only non-capturing groups are supported
+            if not pattern.startswith("?:", i + 1):
+                return None
+            out.append(char)
+        else:
+            out.append(char)
+        i += 1
+    return None if in_class else "".join(out)
+
+
+def _is_class_start(out) -> bool:
+    """Whether a "]" would be the first member of the class being written."""
+    return out[-1] == "[" or (out[-1] == "^" and out[-2] == "[")
@@ -0,0 +1,66 @@
+"""
+Regular expression engines for the preprocessing patterns
+
+"re" is Python's backtracking engine. "re2" compiles the patterns with
+google-re2 (pip install spanish-nlp[re2]), whose matching time is linear in the
+length of the text for any pattern and input. Patterns that RE2 cannot
+express (lookarounds, backreferences, word boundaries) are compiled with re.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Union
+
+from spanish_nlp.utils.re2_syntax import to_re2
+
+logger = logging.getLogger(__name__)
+
+REGEX_ENGINES = ("re", "re2")
+
+# re flags with an inline RE2 equivalent; re.UNICODE is the default of both
+_INLINE_FLAGS = {re.IGNORECASE: "i", re.MULTILINE: "m", re.DOTALL: "s"}
+_SUPPORTED_FLAGS = re.IGNORECASE | re.MULTILINE | re.DOTALL | re.UNICODE
+
+
+def check_engine(engine: str) -> None:
+    """Raise an error when a regex engine is unknown or not installed.
+
+    Args:
+        engine (str): "re" or "re2".
+    """
+    if engine not in REGEX_ENGINES:
+        available = ", ".join(REGEX_ENGINES)
+        raise ValueError(f"Unknown regex engine {engine!r}. Available engines: {available}")
+    if engine == "re2":
+        try:
+            import re2  # noqa: F401
+        except ImportError as error:
+            raise ImportError("regex_engine='re2' requires google-re2: pip install spanish-nlp[re2]") from error
+
+
+@lru_cache(maxsize=None)
+def compile_pattern(pattern: Union[str, "re.Pattern"], engine: str = "re") -> Any:
+    """Compile a pattern with the given engine.
+
+    Args:
+        pattern (str or re.Pattern): Python pattern, with its flags when compiled.
+        engine (str, optional): "re" or "re2". Defaults to "re".
+
+    Returns:
+        re.Pattern or re2 pattern: Compiled pattern with the sub, search, match,
+        fullmatch, finditer and split methods of re.Pattern. With "re2", patterns
+        without an RE2 equivalent are compiled with re.
+    """
+    check_engine(engine)
+    pattern = re.compile(pattern)
+    if engine == "re":
+        return pattern
+    source = to_re2(pattern.pattern)
+    if source is None or pattern.flags & ~_SUPPORTED_FLAGS:
+        logger.debug("Pattern %r has no RE2 equivalent, compiling it with re", pattern.pattern)
+        return pattern
+    import re2
+
+    inline = "".join(letter for flag, letter in _INLINE_FLAGS.items() if pattern.flags & flag)
+    return re2.compile(f"(?{inline}){source}" if inline else source)
@@ -0,0 +1,125 @@
+"""
+Dictionary-based word segmentation for hashtags written without camel case
+"""
+
+import gzip
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from spanish_nlp.utils.char_table import VOWEL_ACCENTS_TABLE
+
+UNIGRAMS_PATH = os.path.join(os.path.dirname(__file__), "data", "es_unigrams.txt.gz")
+
+# Pieces shorter than this must be frequent words ("y", "de", "los"...), which
+# keeps rare fragments such as "ye" from splitting unknown slang
+MIN_PIECE_LENGTH = 3
+# Largest cost (-100 * log10 frequency) accepted for a short piece
+MAX_SHORT_PIECE_COST = 400
+# Single letters that are words on their own
+SINGLE_LETTER_WORDS = frozenset("aoy")
+MAX_WORD_LENGTH = 24
+SEGMENT_CACHE_SIZE = 100_000
+
+
+def load_unigrams(path: str = UNIGRAMS_PATH) -> Dict[str, int]:
+    """Read a unigram table into a dict from unaccented word to cost.
+
+    The cost of a word is -100 * log10 of its frequency, so the cost of a
+    segmentation is the sum of the costs of its pieces.
+
+    Args:
+        path (str, optional): gzip text file with one "cost<TAB>words" line per
+            frequency bucket. Defaults to the bundled Spanish table.
+
+    Returns:
+        dict: Lowercase unaccented word to cost. Words that only differ in their
+        accents keep the lowest cost.
+    """
+    costs: Dict[str, int] = {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            cost, words = line.rstrip("\n").split("\t")
+            for word in words.split(" "):
+                costs.setdefault(word.lower().translate(VOWEL_ACCENTS_TABLE), int(cost))
+    return costs
+
+
+class WordSegmenter:
+    """Split a run of letters into dictionary words with the Viterbi algorithm."""
+
+    def __init__(self, costs: Optional[Dict[str, int]] = None):
+        """Init class.
+
+        Args:
+            costs (dict, optional): Lowercase unaccented word to cost, as returned by
+                load_unigrams. Defaults to the bundled Spanish table.
+        """
+        self.costs = load_unigrams() if costs is None else costs
+        self.max_length = min(MAX_WORD_LENGTH, max(map(len, self.costs), default=0))
+
+    def _piece_cost_(self, piece: str) -> Optional[int]:
+        cost = self.costs.get(piece)
+        if cost is None or (len(piece) < MIN_PIECE_LENGTH and cost > MAX_SHORT_PIECE_COST):
+            return None
+        if len(piece) == 1 and piece not in SINGLE_LETTER_WORDS:
+            return None
+        return cost
+
+    def segment(self, word: str) -> Optional[List[str]]:
+        """Find the most likely split of a word into dictionary words.
+
+        Args:
+            word (str): Word without spaces, in any case and with or without accents.
+
+        Returns:
+            list or None: Slices of word, in order, when it can be fully covered
+            by at least two dictionary words; None when it is a dictionary word
+            itself or cannot be covered.
+        """
+        key = word.lower().translate(VOWEL_ACCENTS_TABLE)
+        if len(key) != len(word) or key in self.costs:
+            return None
+        # best[i]: (cost, pieces, start of the last piece) of the best split of key[:i]
+        best = [(0, 0, 0)] + [None] * len(key)
+        for end in range(1, len(key) + 1):
+            for start in range(max(0, end - self.max_length), end):
+                if best[start] is None:
+                    continue
+                cost = self._piece_cost_(key[start:end])
+                if cost is None:
+                    continue
+                candidate = (best[start][0] + cost, best[start][1] + 1, start)
+                if best[end] is None or candidate[:2] < best[end][:2]:
+                    best[end] = candidate
+        if best[-1] is None:
+            return None
+        pieces = []
+        end = len(key)
+        while end:
+            start = best[end][2]
+            pieces.append(word[start:end])
+            end = start
+        return pieces[::-1]
+
+
+_default_segmenter = None
+
+
+@lru_cache(maxsize=SEGMENT_CACHE_SIZE)
+def segment_word(word: str) -> Optional[Tuple[str, ...]]:
+    """Segment a word with the bundled Spanish table, memoized per word.
+
+    Args:
+        word (str): Word without spaces.
+
+    Returns:
+        tuple or None: See WordSegmenter.segment; pieces are returned as a tuple.
+    """
+    global _default_segmenter
+    if _default_segmenter is None:
+        _default_segmenter = WordSegmenter()
+    pieces = _default_segmenter.segment(word)
+    return tuple(pieces) if pieces is not None else None
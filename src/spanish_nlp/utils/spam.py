@@ -0,0 +1,145 @@
+"""
+Linear-time reduction of repeated words and phrases, used by reduce_spam
+"""
+
+import re
+from typing import List
+
+# Spam reduction splits the text into words and the single whitespace
+# character after each one, so repeated runs are found in linear time
+WHITESPACE_SPLIT_PATTERN = re.compile(r"(\s)")
+_WORD_PATTERN = re.compile(r"\w+")
+_WORD_CHAR_PATTERN = re.compile(r"\w")
+
+
+def reduce_repeated_words(text: str) -> str:
+    """Keep two copies of a word repeated three or more times in a row.
+
+    Linear-time equivalent of re.sub(r"(\\w+\\s)\\1+", r"\\1\\1", text), which is
+    quadratic in the length of the words. As with the regular expression, the
+    first copy may be the end of a longer word ("ahola hola hola " keeps
+    "ahola hola ") and every copy must be followed by the same whitespace.
+    """
+    # [word, space, word, space, ..., last word]
+    parts = WHITESPACE_SPLIT_PATTERN.split(text)
+    end = len(parts) - 1
+    out = []
+    i = 0
+    while i < end:
+        word, space = parts[i], parts[i + 1]
+        out.append(word)
+        out.append(space)
+        repeated = parts[i + 2]
+        if (
+            i + 3 < end
+            and repeated
+            and parts[i + 3] == space
+            and word.endswith(repeated)
+            and _WORD_PATTERN.fullmatch(repeated)
+        ):
+            out.append(repeated)
+            out.append(space)
+            i += 4
+            while i < end and parts[i] == repeated and parts[i + 1] == space:
+                i += 2
+        else:
+            i += 2
+    if len(out) == end:
+        return text
+    out.append(parts[end])
+    return "".join(out)
+
+
+def reduce_repeated_phrases(text: str) -> str:
+    """Keep two copies of a three-word phrase repeated three or more times in a row.
+
+    Linear-time equivalent of re.sub(r"(\\b(\\w+\\s){3})\\1+", r"\\1\\1", text).
+    """
+    parts = WHITESPACE_SPLIT_PATTERN.split(text)
+    end = len(parts) - 1
+    out = []
+    i = 0
+    while i < end:
+        # The phrase starting at parts[i] and its first repetition
+        repeated = parts[i + 6 : i + 12]
+        first = repeated[0] if i + 12 <= end else ""
+        if (
+            first
+            and parts[i].endswith(first)
+            and parts[i + 1 : i + 6] == repeated[1:]
+            and _WORD_PATTERN.fullmatch(first)
+            and _WORD_PATTERN.fullmatch(parts[i + 2])
+            and _WORD_PATTERN.fullmatch(parts[i + 4])
+            # The phrase starts at a word boundary
+            and (
+                len(parts[i]) == len(first)
+                or not _WORD_CHAR_PATTERN.match(parts[i], len(parts[i]) - len(first) - 1)
+            )
+        ):
+            out.extend(parts[i : i + 12])
+            i += 12
+            while i + 6 <= end and parts[i : i + 6] == repeated:
+                i += 6
+        else:
+            out.append(parts[i])
+            out.append(parts[i + 1])
+            i += 2
+    if len(out) == end:
+        return text
+    out.append(parts[end])
+    return "".join(out)
+
+
+def reduce_repeated_word_tokens(words: List[str]) -> List[str]:
+    """reduce_repeated_words on the words of a text separated by single spaces."""
+    last = len(words) - 1
+    out = []
+    i = 0
+    while i < last:
+        word, repeated = words[i], words[i + 1]
+        out.append(word)
+        # The last word is not followed by a space, so it is never a copy
+        if i + 1 < last and word.endswith(repeated) and _WORD_PATTERN.fullmatch(repeated):
+            out.append(repeated)
+            i += 2
+            while i < last and words[i] == repeated:
+                i += 1
+        else:
+            i += 1
+    if not words or len(out) == last:
+        return words
+    out.append(words[last])
+    return out
+
+
+def reduce_repeated_phrase_tokens(words: List[str]) -> List[str]:
+    """reduce_repeated_phrases on the words of a text separated by single spaces."""
+    last = len(words) - 1
+    out = []
+    i = 0
+    while i < last:
+        repeated = words[i + 3 : i + 6]
+        first = repeated[0] if i + 6 <= last else ""
+        if (
+            first
+            and words[i].endswith(first)
+            and words[i + 1 : i + 3] == repeated[1:]
+            and _WORD_PATTERN.fullmatch(first)
+            and _WORD_PATTERN.fullmatch(words[i + 1])
+            and _WORD_PATTERN.fullmatch(words[i + 2])
+            and (
+                len(words[i]) == len(first)
+                or not _WORD_CHAR_PATTERN.match(words[i], len(words[i]) - len(first) - 1)
+            )
+        ):
+            out.extend(words[i : i + 6])
+            i += 6
+            while i + 3 <= last and words[i : i + 3] == repeated:
+                i += 3
+        else:
+            out.append(words[i])
+            i += 1
+    if not words or len(out) == last:
+        return words
+    out.append(words[last])
+    return out
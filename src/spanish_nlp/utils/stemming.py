@@ -0,0 +1,70 @@
+"""
+Process-wide cached Snowball stemming
+"""
+
+from functools import lru_cache
+from typing import Iterable, List
+
+STEM_CACHE_SIZE = 100_000
+
+_stemmer = None
+
+
+def _stem_word(word: str) -> str:
+    global _stemmer
+    if _stemmer is None:
+        from nltk.stem.snowball import SnowballStemmer
+
+        _stemmer = SnowballStemmer("spanish")
+    return _stemmer.stem(word)
+
+
+_cached_stem = lru_cache(maxsize=STEM_CACHE_SIZE)(_stem_word)
+
+
+def stem(word: str) -> str:
+    """Stem a Spanish word with the Snowball stemmer, through the shared cache.
+
+    The cache is shared by every SpanishPreprocess in the process. Word
+    frequencies follow Zipf's law, so a bounded cache absorbs most calls.
+
+    Args:
+        word (str): Word to stem.
+
+    Returns:
+        str: Stem of the word.
+    """
+    return _cached_stem(word)
+
+
+def stem_tokens(tokens: Iterable[str]) -> List[str]:
+    """Stem a sequence of words through the shared cache.
+
+    Args:
+        tokens (iterable of str): Words to stem.
+
+    Returns:
+        list: Stems, in the same order as the words.
+    """
+    return list(map(_cached_stem, tokens))
+
+
+def stem_cache_info():
+    """Return the hits, misses, maxsize and current size of the stem cache."""
+    return _cached_stem.cache_info()
+
+
+def configure_stem_cache(maxsize: int = STEM_CACHE_SIZE) -> None:
+    """Replace the stem cache with an empty one of the given size.
+
+    Args:
+        maxsize (int, optional): Maximum number of cached words. None makes the
+            cache unbounded. Defaults to STEM_CACHE_SIZE.
+    """
+    global _cached_stem
+    _cached_stem = lru_cache(maxsize=maxsize)(_stem_word)
+
+
+def clear_stem_cache() -> None:
+    """Empty the stem cache and reset its counters."""
+    _cached_stem.cache_clear()
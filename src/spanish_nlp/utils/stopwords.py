@@ -1,4 +1,8 @@
 import os
+from functools import lru_cache
+from typing import FrozenSet
+
+from spanish_nlp.utils.char_table import VOWEL_ACCENTS_TABLE
 
 DETERMINANTES = [
     "el",
@@ -880,4 +884,77 @@ punct = [
     "»",
     "‹",
     "›",
-]
\ No newline at end of file
+]
+STOPWORDS_LISTS = ("default", "extended", "nltk", "spacy")
+
+
+def _nltk_stopwords():
+    """Read the NLTK Spanish list, downloading the corpus only if it is missing."""
+    import nltk
+    from nltk.corpus import stopwords
+
+    try:
+        return stopwords.words("spanish")
+    except LookupError:
+        nltk.download("stopwords", quiet=True)
+        return stopwords.words("spanish")
+
+
+def _spacy_stopwords():
+    """Read the spaCy Spanish list without loading a pipeline."""
+    from spacy.lang.es.stop_words import STOP_WORDS
+
+    return STOP_WORDS
+
+
+@lru_cache(maxsize=None)
+def _named_stopwords(name: str) -> FrozenSet[str]:
+    if name == "default":
+        return frozenset(default_stopwords)
+    if name == "extended":
+        return frozenset(extended_stopwords)
+    if name == "nltk":
+        return frozenset(_nltk_stopwords())
+    if name == "spacy":
+        return frozenset(_spacy_stopwords())
+    raise ValueError(
+        "Stopwords must be a list or one of the following: " + ", ".join(f"'{n}'" for n in STOPWORDS_LISTS)
+    )
+
+
+@lru_cache(maxsize=None)
+def get_stopwords(name: str, lowercase: bool = True, strip_accents: bool = False) -> FrozenSet[str]:
+    """Resolve a named stopwords list into a frozenset.
+
+    Lists are built once per process and shared by every caller, so the NLTK
+    corpus is fetched at most once and spaCy pipelines are never loaded.
+
+    Args:
+        name (str): 'default', 'extended', 'nltk' or 'spacy', or several of them
+            joined with '+' (e.g. 'extended+nltk') for their union.
+        lowercase (bool, optional): lowercase the words. Defaults to True.
+        strip_accents (bool, optional): add the unaccented form of every word,
+            so the list also matches text whose accents were removed. Defaults to False.
+
+    Returns:
+        frozenset: Stopwords.
+    """
+    words = frozenset().union(*(_named_stopwords(part.strip()) for part in name.split("+")))
+    return fold_stopwords(words, lowercase=lowercase, strip_accents=strip_accents)
+
+
+def fold_stopwords(words, lowercase: bool = True, strip_accents: bool = False) -> FrozenSet[str]:
+    """Build a frozenset of stopwords with optional case and accent folding.
+
+    Args:
+        words (iterable of str): Stopwords.
+        lowercase (bool, optional): lowercase the words. Defaults to True.
+        strip_accents (bool, optional): add the unaccented form of every word. Defaults to False.
+
+    Returns:
+        frozenset: Stopwords.
+    """
+    words = frozenset(word.lower() for word in words) if lowercase else frozenset(words)
+    if strip_accents:
+        words |= {word.translate(VOWEL_ACCENTS_TABLE) for word in words}
+    return words
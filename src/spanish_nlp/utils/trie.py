@@ -0,0 +1,43 @@
+"""
+Trie-compiled regular expressions for large sets of literal strings
+"""
+
+import re
+from typing import Dict, Iterable
+
+
+def trie_regex(words: Iterable[str]) -> str:
+    """Build a regular expression that matches any of the given strings.
+
+    The strings are stored in a prefix tree and each node becomes a group, so
+    the regex engine follows a single branch per character instead of trying
+    every alternative. At each position the longest string is preferred.
+
+    Args:
+        words (iterable of str): Literal strings to match. Empty strings are ignored.
+
+    Returns:
+        str: Pattern source. It never matches when no strings are given.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    if not trie:
+        return "(?!)"
+    return _node_regex(trie)
+
+
+def _node_regex(node: Dict[str, dict]) -> str:
+    branches = [re.escape(char) + _node_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    is_word_end = "" in node
+    if len(branches) == 1 and not is_word_end:
+        return branches[0]
+    pattern = "(?:" + "|".join(branches) + ")"
+    return pattern + "?" if is_word_end else pattern
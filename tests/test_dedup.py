@@ -0,0 +1,56 @@
+import unittest
+
+from parameterized import parameterized
+
+from spanish_nlp import SpanishPreprocess
+from spanish_nlp.preprocess.dedup import NearDuplicateIndex, shingles
+
+
+class TestNearDuplicateIndex(unittest.TestCase):
+    def setUp(self):
+        self.text = (
+            "El gobierno anunció nuevas medidas económicas para todas las regiones del país "
+            "y la oposición pidió más detalles sobre el presupuesto del próximo año"
+        )
+        self.other = "Mañana vamos a la playa con los niños y la familia si no llueve en la costa"
+
+    @parameterized.expand(
+        [
+            ("emoji", " 😀🔥 #FelizViernes"),
+            ("retweet", "RT @usuario: "),
+        ]
+    )
+    def test_groups_variants_after_preprocessing(self, name, extra):
+        variant = extra + self.text if name == "retweet" else self.text + extra
+        index = NearDuplicateIndex(preprocessor=SpanishPreprocess())
+        self.assertEqual(index.add_batch([self.text, self.other, variant]), [0, 1, 0])
+
+    def test_one_word_variant(self):
+        index = NearDuplicateIndex()
+        index.add(self.text, key="original")
+        self.assertEqual(index.query(self.text.replace("nuevas", "grandes")), "original")
+        self.assertIsNone(index.query(self.other))
+        self.assertEqual(len(index), 1)
+
+    def test_max_size(self):
+        index = NearDuplicateIndex(max_size=2)
+        index.add(self.text, key="a")
+        index.add(self.other, key="b")
+        index.add("Un texto completamente distinto de los anteriores", key="c")
+        self.assertEqual(len(index), 2)
+        self.assertIsNone(index.query(self.text))
+        self.assertEqual(index.query(self.other), "b")
+        self.assertTrue(all(key != "a" for buckets in index._buckets for keys in buckets.values() for key in keys))
+
+    def test_shingles(self):
+        self.assertEqual(shingles("hola  mundo", 5), {"hola ", "ola m", "la mu", "a mun", " mund", "mundo"})
+        self.assertEqual(shingles("hola", 5), {"hola"})
+        self.assertEqual(shingles(" ", 5), set())
+
+    def test_invalid_bands(self):
+        with self.assertRaises(ValueError):
+            NearDuplicateIndex(num_perm=128, bands=10)
+
+
+if __name__ == "__main__":
+    unittest.main()
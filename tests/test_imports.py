@@ -0,0 +1,45 @@
+import json
+import subprocess
+import sys
+import unittest
+
+# Seconds allowed for `from spanish_nlp import SpanishPreprocess` in a fresh interpreter
+IMPORT_TIME_BUDGET = 1.5
+
+HEAVY_MODULES = ["torch", "transformers", "spacy", "pandas", "datasets", "tqdm"]
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from spanish_nlp import SpanishPreprocess
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+class TestImports(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT], capture_output=True, text=True, check=True
+        ).stdout
+        cls.result = json.loads(output.strip().splitlines()[-1])
+
+    def test_preprocess_import_skips_heavy_modules(self):
+        loaded = [module for module in HEAVY_MODULES if module in self.result["modules"]]
+        self.assertEqual(loaded, [])
+
+    def test_preprocess_import_time_budget(self):
+        self.assertLess(self.result["elapsed"], IMPORT_TIME_BUDGET)
+
+    def test_lazy_attributes(self):
+        import spanish_nlp
+
+        self.assertIn("SpanishClassifier", dir(spanish_nlp))
+        self.assertTrue(callable(spanish_nlp.augmentation.Spelling))
+        with self.assertRaises(AttributeError):
+            getattr(spanish_nlp, "missing_attribute")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,24 @@
+import asyncio
+import csv
+import importlib.util
+import json
+import os
+import re
+import tempfile
 import unittest
+from unittest import mock
 
 from parameterized import parameterized
 from spanish_nlp import SpanishPreprocess
+from spanish_nlp.preprocess import MultiPreprocess
+from spanish_nlp.preprocess.cache import CacheStats, LRUCache, SQLiteCache, TransformCache
+from spanish_nlp.preprocess.parallel import resolve_n_jobs
+from spanish_nlp.utils.markup import open_markup
+from spanish_nlp.utils.re2_syntax import to_re2
+from spanish_nlp.utils.regex_engine import compile_pattern
+from spanish_nlp.utils.emo_unicode import demoticonize, emoticonize
+from spanish_nlp.utils.stemming import clear_stem_cache, stem_cache_info, stem_tokens
+from spanish_nlp.utils.stopwords import fold_stopwords, get_stopwords
 
 
 class TestTextPreprocessor(unittest.TestCase):
@@ -64,11 +81,27 @@ Si colaboras con este repositorio te puedes ganar $100.000 (en dinero falso). O
                 "esto es un #hashtag, pero 4gcf#assf y 13#3 no lo son",
                 "esto es un hashtag, pero 4gcf#assf y 13#3 no lo son",
             ),
+            (
+                "dijo #Si y luego #SiSeñor",
+                "dijo Si y luego Si Señor",
+            ),
         ]
     )
     def test_split_hashtags(self, text, expected):
         self.assertEqual(self.preprocessor._split_hashtags_(text), expected)
 
+    @parameterized.expand(
+        [
+            ("Fuimos a marchar #vivanlospinguinos", "Fuimos a marchar vivan los pinguinos"),
+            ("#QuedateEnCasa #quedateencasa", "Quedate En Casa quedate en casa"),
+            ("esto es un #ejemplo de #hashtags", "esto es un ejemplo de hashtags"),
+            ("no se divide #yey ni #asdfgh", "no se divide yey ni asdfgh"),
+        ]
+    )
+    def test_segment_hashtags(self, text, expected):
+        pp = SpanishPreprocess(segment_hashtags=True)
+        self.assertEqual(pp._split_hashtags_(text), expected)
+
     @parameterized.expand(
         [
             (
@@ -85,12 +118,28 @@ Si colaboras con este repositorio te puedes ganar $100.000 (en dinero falso). O
         self.preprocessor.remove_url = True
         self.assertEqual(self.preprocessor._remove_url_(text), expected)
 
-    def test_remove_html_tags(self):
-        self.preprocessor.remove_html_tags = True
-        text = "<p>Este texto</p> <b>contiene</b> <i>etiquetas HTML</i>."
-        expected = "Este texto contiene etiquetas HTML."
+    @parameterized.expand(
+        [
+            ("<p>Este texto</p> <b>contiene</b> <i>etiquetas HTML</i>.", "Este texto contiene etiquetas HTML."),
+            ("<p>Pingüinos &amp; ñandúes&nbsp;&#241;&#xF1;</p>", "Pingüinos & ñandúes ññ"),
+            ("&Aacute;rbol &lt;b&gt; &bogus; AT&T", "árbol <b> &bogus; AT&T"),
+            ("<script>var a = '<b>';</script>Hola<STYLE>p {}</style><!-- nota\n -->mundo", "Holamundo"),
+            ('<a\nhref="x">enlace</a> <!DOCTYPE html>', "enlace "),
+            ("a < b y c > d", "a < b y c > d"),
+            ("texto <!-- sin cerrar", "texto "),
+        ]
+    )
+    def test_remove_html_tags(self, text, expected):
         self.assertEqual(self.preprocessor._remove_html_tags_(text), expected)
 
+    def test_open_markup(self):
+        text = "hola <!-- nota\nlarga --> <script>\nx\n</script> <a\nhref=http://x.com/>\nfin"
+        self.assertEqual(open_markup(text, 0, text.index("larga")), 5)
+        self.assertIsNone(open_markup(text, 0, text.index(" <script>")))
+        self.assertEqual(open_markup(text, 0, text.index("x\n")), text.index("<script>"))
+        self.assertIsNone(open_markup(text, 0, text.index("fin")))
+        self.assertIsNotNone(open_markup(text, 0, text.index("fin"), remove_urls=True))
+
     def test_remove_numbers(self):
         self.preprocessor.remove_numbers = True
         text = "Este texto tiene números como 123 y 45678."
@@ -108,6 +157,18 @@ Si colaboras con este repositorio te puedes ganar $100.000 (en dinero falso). O
         text = "Este texto contiene varias palabras."
         self.assertTrue(self.preprocessor._stem_(text) != text)
 
+    def test_stem_cache(self):
+        from nltk.stem.snowball import SnowballStemmer
+
+        words = "los niños corrían y los niños saltaban".split()
+        expected = [SnowballStemmer("spanish").stem(word) for word in words]
+        clear_stem_cache()
+        self.assertEqual(stem_tokens(words), expected)
+        info = stem_cache_info()
+        self.assertEqual((info.hits, info.misses), (2, 5))
+        self.assertEqual(self.preprocessor._stem_(" ".join(words)), " ".join(expected))
+        self.assertEqual(stem_cache_info().hits, 9)
+
     def test_lemmatize(self):
         self.preprocessor._prepare_lemmatize_(force=True)
         self.preprocessor.stem = True
@@ -144,6 +205,12 @@ Si colaboras con este repositorio te puedes ganar $100.000 (en dinero falso). O
         self.assertEqual(pp_text, expected)
         self.assertTrue(text != pp_text)
 
+    def test_emoticons_longest_match(self):
+        text = "muy feliz :-)) y triste D:<"
+        converted = demoticonize(text, delimiters=("[", "]"))
+        self.assertEqual(converted, "muy feliz [very_happy] y triste [disgust]")
+        self.assertEqual(emoticonize(converted, delimiters=("[", "]")), text)
+
     def test_normalize_inclusive_language(self):
         text = "hola a todxs un saludo a mis amiges"
         expected = "hola a todos un saludo a mis amigos"
@@ -152,6 +219,19 @@ Si colaboras con este repositorio te puedes ganar $100.000 (en dinero falso). O
         self.assertEqual(pp_text, expected)
         self.assertTrue(text != pp_text)
 
+    def test_normalize_inclusive_language_whole_words(self):
+        text = "les dije a tales amiges que las claves son de elles"
+        expected = "los dije a tales amigos que las claves son de elles"
+        self.assertEqual(self.preprocessor._normalize_inclusive_language_(text), expected)
+
+    def test_normalize_inclusive_language_custom_words(self):
+        pp = SpanishPreprocess(
+            normalize_inclusive_language=True,
+            inclusive_words={"elles": "ellos", "vecines": "vecinos", "les": "les"},
+        )
+        text = "les vecines y elles llegaron"
+        self.assertEqual(pp._normalize_inclusive_language_(text), "les vecinos y ellos llegaron")
+
     def test_transform_remove_stopwords(self):
         text = "En aquel tiempo yo tenía veinte años y estaba loco. Había perdido un país pero había ganado un sueño. Y si tenía ese sueño lo demás no importaba. Ni trabajar ni rezar ni estudiar en la madrugada junto a los perros románticos."
         expected = "tiempo tenía veinte años estaba loco. Había perdido país había ganado sueño. si tenía sueño lo demás no importaba. trabajar rezar estudiar madrugada junto perros románticos."
@@ -161,6 +241,18 @@ Si colaboras con este repositorio te puedes ganar $100.000 (en dinero falso). O
         self.assertEqual(pp_text, expected)
         self.assertTrue(text != pp_text)
 
+    def test_stopwords_registry(self):
+        default = get_stopwords("default")
+        self.assertIsInstance(default, frozenset)
+        self.assertIs(get_stopwords("default"), default)
+        self.assertEqual(get_stopwords("default+spacy"), default | get_stopwords("spacy"))
+        self.assertIn("tu", fold_stopwords(["Tú"], strip_accents=True))
+        with self.assertRaises(ValueError):
+            get_stopwords("default+unknown")
+
+        pp = SpanishPreprocess(remove_stopwords=True, stopwords_list="default+spacy")
+        self.assertIs(pp.stopwords_list, get_stopwords("default+spacy"))
+
     def test_transform_remove_multiple_spaces(self):
         text = "Este    texto  tiene varios         espacios. "
         expected = "Este texto tiene varios espacios."
@@ -190,6 +282,26 @@ Si colaboras con este repositorio te puedes ganar $100.000 (en dinero falso). O
         self.assertEqual(pp_text, expected)
         self.assertTrue(text != pp_text)
 
+    @parameterized.expand(
+        [
+            ("hola hola hola hola hola hola", "hola hola hola"),
+            ("ahola hola hola hola fin", "ahola hola fin"),
+            ("no no\nno no", "no no\nno no"),
+            ("a b c a b c a b c a b c fin", "a b c a b c fin"),
+            ("x,a b c a b c a b c fin", "x,a b c a b c fin"),
+            ("a" * 50_000 + " b", "a" * 50_000 + " b"),
+            ("jaja " * 10_000, "jaja jaja "),
+        ]
+    )
+    def test_reduce_spam_matches_patterns(self, text, expected):
+        self.assertEqual(self.preprocessor._reduce_spam_(text), expected)
+
+    def test_spam_max_length(self):
+        pp = SpanishPreprocess(spam_max_length=10)
+        self.assertEqual(pp._reduce_spam_("si si si si"), "si si si si")
+        self.assertEqual(pp._remove_reduplications_("holaaaa siii"), "holaaaa siii")
+        self.assertEqual(pp._reduce_spam_("si si si "), "si si ")
+
     def test_transform_remove_reduplications(self):
         text = "holaaaa banana no te creoooo naaada"
         expected = "hola banana no te creo nada"
@@ -197,6 +309,433 @@ Si colaboras con este repositorio te puedes ganar $100.000 (en dinero falso). O
         self.assertEqual(pp_text, expected)
         self.assertTrue(text != pp_text)
 
+    @parameterized.expand(
+        [
+            ("html_numbers", {"remove_html_tags": True, "remove_numbers": True}),
+            ("numbers_hashtags", {"remove_numbers": True, "remove_hashtags": True}),
+            (
+                "html_numbers_hashtags",
+                {"remove_html_tags": True, "remove_numbers": True, "remove_hashtags": True},
+            ),
+        ]
+    )
+    def test_fused_removals_match_single_steps(self, name, options):
+        params = dict(self.params, remove_emojis=True, remove_emoticons=True, **options)
+        pp = SpanishPreprocess(**params)
+        texts = [
+            self.text,
+            "#1 #a1 #12b <b>12</b> 3<i>4</i>5 #<i>x</i> #<i>1</i> 4gcf#assf",
+            "<p>Tengo 20 #gatos2023 y #123</p> #_ #1_ <a href=1>link</a>",
+            "&#49;2 &amp; <!-- 3 -->4 &#x31;a #&#49; <script>5</script>6",
+        ]
+        for text in texts:
+            expected = text
+            if params["remove_html_tags"]:
+                expected = pp._remove_html_tags_(expected)
+            if params["remove_numbers"]:
+                expected = pp._remove_numbers_(expected)
+            if params["remove_hashtags"]:
+                expected = pp._remove_hashtags_(expected)
+            expected = pp._normalize_punctuation_spelling_(expected)
+            self.assertEqual(pp.transform(text), expected)
+
+    @parameterized.expand(
+        [
+            ("stopwords", {"remove_stopwords": True, "stopwords_list": "default"}, "_remove_stopwords_"),
+            (
+                "stopwords_punctuation",
+                {"remove_stopwords": True, "stopwords_list": "default", "remove_punctuation": False},
+                "_remove_stopwords_",
+            ),
+            (
+                "stem",
+                {"stem": True, "remove_punctuation": False, "remove_vowels_accents": False, "remove_unprintable": False},
+                "_stem_",
+            ),
+        ]
+    )
+    def test_token_mode_matches_single_steps(self, name, options, first):
+        pp = SpanishPreprocess(**options)
+        fused = [step.name for step in pp._token_plan if step.name.startswith(first + "+")]
+        self.assertEqual(len(fused), 1)
+        self.assertIn("_reduce_spam_", fused[0])
+        texts = [
+            self.text,
+            "la casa la casa la casa la casa y el perro perro perro perro fin",
+            "ahola hola hola hola , bien .mal ( : hola\n\n  adiós ¿qué? 1,5 a.b",
+            "",
+        ]
+        for text in texts:
+            expected = text
+            for step in pp._plan:
+                expected = step.func(expected)
+            self.assertEqual(pp.transform(text), expected)
+        self.assertEqual(pp.transform_batch(texts), [pp.transform(text) for text in texts])
+
+    def test_normalize_characters_matches_single_steps(self):
+        text = self.text + " Àà Üü ÿ \x00\x07 ñÑ ①"
+        expected = self.preprocessor._remove_unprintable_(
+            self.preprocessor._remove_vowels_accents_(text)
+        )
+        self.assertEqual(self.preprocessor._normalize_characters_(text), expected)
+        self.assertEqual(self.preprocessor._normalize_characters_("plain ascii\ttext\x00"), "plain ascii\ttext")
+
+    def test_normalize_fancy_letters(self):
+        pp = SpanishPreprocess(normalize_fancy_letters=True)
+        self.assertTrue(pp.transform(self.text).startswith("texto de prueba\nhola a todxs"))
+        pp = SpanishPreprocess(**dict(self.params, normalize_fancy_letters=True))
+        self.assertEqual(pp.transform("𝓣𝓮𝔁𝓽𝓸 ＦＵＬＬ ⓒⓘⓡⓒⓛⓔ"), "Texto FULL circle")
+
+    @parameterized.expand([(True, False), (False, True), (False, False)])
+    def test_protect_spans(self, remove_emojis, remove_emoticons):
+        params = dict(
+            remove_emojis=remove_emojis,
+            remove_emoticons=remove_emoticons,
+            normalize_inclusive_language=True,
+        )
+        round_trip = SpanishPreprocess(**params)
+        protected = SpanishPreprocess(protect_spans=True, **params)
+        texts = [self.text, "¿Qué tal? 👍🏽 bien :-)) y tú? (: ok 8) 🇨🇱", "sin emojis, ni emoticones."]
+        for text in texts:
+            self.assertEqual(protected.transform(text), round_trip.transform(text))
+
+    def test_protect_spans_keeps_emoji_names_intact(self):
+        pp = SpanishPreprocess(remove_emojis=False, protect_spans=True)
+        self.assertEqual(pp.transform("el numero #️⃣ y 🇨🇱"), "el numero#️⃣ y 🇨🇱")
+
+    def test_transform_batch(self):
+        texts = [self.text, "Hola #MundoFeliz :)", self.text, "<b>Chao</b> 123", ""]
+        expected = [self.preprocessor.transform(text) for text in texts]
+        self.assertEqual(self.preprocessor.transform_batch(texts), expected)
+
+    def test_transform_batch_lemmatize(self):
+        texts = [self.text, "Los niños corrían rápido", "<b>Chao</b> 123", ""]
+        pp = SpanishPreprocess(lemmatize=True, lemmatize_batch_size=2)
+        expected = [pp.transform(text) for text in texts]
+        self.assertEqual(pp.transform_batch(texts), expected)
+
+    def test_lemma_memo(self):
+        pp = SpanishPreprocess(lemmatize=True, lemma_cache_size=3)
+        self.assertEqual(pp._lemmatize_("Los niños corrían"), "el niño correr")
+        self.assertEqual(pp._lemma_memo, {"Los": "el", "niños": "niño", "corrían": "correr"})
+        self.assertEqual(pp._lemmatize_batch_(["niños  corrían", "corrían los niños"])[0], "niño   correr")
+        self.assertEqual(len(pp._lemma_memo), 3)
+        self.assertNotIn("Los", pp._lemma_memo)
+
+    def test_transform_batch_parallel(self):
+        texts = [self.text, "Hola #MundoFeliz :)", self.text, "<b>Chao</b> 123"] * 3
+        expected = [self.preprocessor.transform(text) for text in texts]
+        with SpanishPreprocess() as pp:
+            self.assertEqual(pp.transform_batch(texts, n_jobs=2, chunksize=1), expected)
+            pool = pp._pool
+            self.assertEqual(pp.transform_batch(texts[::-1], n_jobs=2), expected[::-1])
+            self.assertIs(pp._pool, pool)
+        self.assertIsNone(pp._pool)
+
+    def test_assign_option(self):
+        pp = SpanishPreprocess(cache=LRUCache(8))
+        self.assertEqual(pp.transform("HOLA Mundo"), "hola mundo")
+        pp.lower = False
+        self.assertEqual(pp.transform("HOLA Mundo"), "HOLA Mundo")
+        self.assertFalse(pp.get_config()["lower"])
+        self.assertEqual(SpanishPreprocess(**pp.get_config())._fingerprint, pp._fingerprint)
+        pp.stopwords_list = ["Mundo"]
+        self.assertEqual(pp.stopwords_list, fold_stopwords(["Mundo"]))
+        self.assertEqual(pp.get_config()["stopwords_list"], ["Mundo"])
+        with self.assertRaises(ValueError):
+            pp.regex_engine = "pcre"
+        self.assertEqual(pp.regex_engine, "re")
+        self.assertEqual(pp.transform("HOLA Mundo"), "HOLA Mundo")
+        pool = pp._pool = mock.Mock()
+        pp.lower = True
+        pool.close.assert_called_once_with()
+        self.assertIsNone(pp._pool)
+
+    @parameterized.expand([(1, 1), (None, 1), (8, 7)])
+    def test_resolve_n_jobs(self, cpu_count, expected):
+        with mock.patch("os.cpu_count", return_value=cpu_count):
+            self.assertEqual(resolve_n_jobs(-1), expected)
+            self.assertEqual(SpanishPreprocess(async_n_jobs=-1).async_n_jobs, expected)
+        with self.assertRaises(ValueError):
+            resolve_n_jobs(0)
+
+    def test_transform_async(self):
+        texts = [self.text, "Hola #MundoFeliz :)", self.text, "<b>Chao</b> 123", ""] * 4
+        expected = [self.preprocessor.transform(text) for text in texts]
+
+        async def run(pp):
+            single = await asyncio.gather(*[pp.transform_async(text) for text in texts])
+            batch = await pp.transform_batch_async(texts)
+            return list(single), batch
+
+        with SpanishPreprocess(async_batch_size=8, async_max_in_flight=5) as pp:
+            with mock.patch.object(pp, "transform_batch", wraps=pp.transform_batch) as transform_batch:
+                self.assertEqual(asyncio.run(run(pp)), (expected, expected))
+                # Concurrent calls are transformed together
+                self.assertLess(transform_batch.call_count, len(texts))
+            # A new event loop gets its own batcher
+            self.assertEqual(asyncio.run(run(pp)), (expected, expected))
+        self.assertIsNone(pp._batcher)
+
+    def test_transform_async_error(self):
+        async def run():
+            return await asyncio.gather(
+                self.preprocessor.transform_async("Hola :)"),
+                self.preprocessor.transform_async(None),
+                return_exceptions=True,
+            )
+
+        ok, error = asyncio.run(run())
+        self.assertEqual(ok, "hola")
+        self.assertIsInstance(error, TypeError)
+        self.preprocessor.close()
+
+    def test_transform_async_close(self):
+        pp = SpanishPreprocess(async_batch_size=4)
+
+        async def run():
+            tasks = [asyncio.ensure_future(pp.transform_async(self.text)) for _ in range(50)]
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            pp.close()
+            return await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 10)
+
+        results = asyncio.run(run())
+        errors = [result for result in results if isinstance(result, Exception)]
+        self.assertTrue(errors)
+        self.assertTrue(all(isinstance(error, RuntimeError) for error in errors))
+        self.assertTrue(all(result == self.preprocessor.transform(self.text) for result in results if result not in errors))
+
+    def test_multi_preprocess(self):
+        configs = {
+            "default": {},
+            "keep_emojis": {"remove_emojis": False, "remove_emoticons": False},
+            "protected": {"remove_emojis": False, "protect_spans": True},
+            "stem": {"stem": True},
+            "stopwords": {"remove_stopwords": True, "stopwords_list": "extended"},
+            "accents": {"remove_vowels_accents": False, "segment_hashtags": True},
+            "profiled": {"profile": True},
+        }
+        texts = [self.text, "Hola #MundoFeliz :) 😀", self.text, "<b>Chao</b> 123", ""]
+        multi = MultiPreprocess(configs)
+        expected = {name: [SpanishPreprocess(**config).transform(t) for t in texts] for name, config in configs.items()}
+        self.assertEqual(multi.transform_batch(texts), expected)
+        self.assertEqual(multi.transform(texts[1]), {name: outputs[1] for name, outputs in expected.items()})
+        self.assertLess(multi.n_steps, sum(len(pp._plan) for pp in multi.preprocessors.values()))
+        self.assertEqual(multi.preprocessors["profiled"].profile_stats()["_lower_"]["texts"], 5)
+
+    @parameterized.expand(
+        [
+            ({},),
+            ({"normalize_breaklines": False, "remove_punctuation": False},),
+            ({"remove_stopwords": True, "stopwords_list": "extended", "remove_emojis": False},),
+            ({"stem": True, "split_hashtags": False, "remove_hashtags": True},),
+        ]
+    )
+    def test_transform_chunked(self, params):
+        paragraphs = [
+            self.text,
+            "Hola hola hola hola\n#SiSeñor jaja jaja",
+            "jaja jaja jaja jaja. Saludos",
+            "Visita https://www.google.com <b>ahora</b> 123 😀😀 XD",
+            "Fin fin fin del texto.",
+            "<script>\nvar x\nfoo bar\n</script> Hola\n<!-- nota\nlarga -->\n&amp; fin <a\nhref=https://x.com/>\nenlace</a>",
+        ]
+        text = "\n\n".join(paragraphs * 5)
+        pp = SpanishPreprocess(**params)
+        self.assertEqual(pp.transform_chunked(text, chunk_size=50), pp.transform(text))
+        self.assertEqual(pp.transform_chunked(self.text), pp.transform(self.text))
+
+    def test_transform_chunked_parallel(self):
+        text = "\n\n".join([self.text, "Hola hola hola hola", "Saludos desde Chile"] * 4)
+        with SpanishPreprocess() as pp:
+            self.assertEqual(pp.transform_chunked(text, chunk_size=40, n_jobs=2), pp.transform(text))
+
+    def test_transform_chunked_invalid_size(self):
+        with self.assertRaises(ValueError):
+            self.preprocessor.transform_chunked(self.text, chunk_size=0)
+
+    def test_transform_cache(self):
+        texts = [self.text, "Hola #MundoFeliz :)", self.text, "<b>Chao</b> 123"]
+        expected = [self.preprocessor.transform(text) for text in texts]
+        with tempfile.TemporaryDirectory() as tmp:
+            for cache in (LRUCache(maxsize=10), SQLiteCache(os.path.join(tmp, "cache.db"))):
+                pp = SpanishPreprocess(cache=cache)
+                self.assertEqual(pp.transform_batch(texts), expected)
+                self.assertEqual(pp.transform(texts[1]), expected[1])
+                self.assertEqual(cache.stats(), CacheStats(hits=1, misses=3, size=3))
+
+                other = SpanishPreprocess(lower=False, cache=cache)
+                self.assertEqual(other.transform(texts[1]), "Hola Mundo Feliz")
+                self.assertEqual(cache.stats().size, 4)
+                self.assertEqual(cache.stats().hit_ratio, 0.2)
+                cache.close()
+
+    def test_cache_fingerprint(self):
+        with self.assertRaises(TypeError):
+            TransformCache()
+        default = SpanishPreprocess()._fingerprint
+        keep_emojis = SpanishPreprocess(remove_emojis=False)._fingerprint
+        with mock.patch("spanish_nlp.preprocess.cache._package_version", return_value="0.0"):
+            # Only the libraries of the enabled steps are part of the key
+            self.assertEqual(SpanishPreprocess()._fingerprint, default)
+            self.assertNotEqual(SpanishPreprocess(remove_emojis=False)._fingerprint, keep_emojis)
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_transform_arrow(self):
+        import pyarrow as pa
+
+        texts = [self.text, "Hola #MundoFeliz :) ΟΔΟΣ", None, "<b>Chao</b> 123   #1a", ""]
+        expected = [None if text is None else self.preprocessor.transform(text) for text in texts]
+        array = pa.chunked_array([texts[:2], texts[2:]], type=pa.large_string())
+        result = self.preprocessor.transform_arrow(array)
+        self.assertEqual(result.type, pa.large_string())
+        self.assertEqual(result.to_pylist(), expected)
+
+        import pandas as pd
+
+        series = pd.Series(texts, index=list("abcde"), name="text")
+        for dtype in (object, "string[pyarrow]", pd.ArrowDtype(pa.string())):
+            transformed = self.preprocessor.transform_pandas(series.astype(dtype))
+            self.assertEqual(transformed.dtype, series.astype(dtype).dtype)
+            self.assertEqual(list(transformed.index), list("abcde"))
+            self.assertEqual([None if pd.isna(v) else v for v in transformed], expected)
+
+    @unittest.skipUnless(importlib.util.find_spec("polars"), "polars is not installed")
+    def test_transform_polars(self):
+        import polars as pl
+
+        series = pl.Series("text", ["Hola #MundoFeliz :)", None, "<b>Chao</b> 123"])
+        expected = [None if text is None else self.preprocessor.transform(text) for text in series]
+        result = self.preprocessor.transform_polars(series)
+        self.assertEqual(result.name, "text")
+        self.assertEqual(result.to_list(), expected)
+
+    @parameterized.expand(
+        [
+            (r"#(?=\d)\w+",),
+            (r"(\w+\s)\1+",),
+            (r"\bhola\b",),
+            (r"[^\W\d]",),
+        ]
+    )
+    def test_to_re2_rejects_unsupported(self, pattern):
+        self.assertIsNone(to_re2(pattern))
+
+    def test_regex_engine(self):
+        with self.assertRaises(ValueError):
+            SpanishPreprocess(regex_engine="pcre")
+        with mock.patch.dict("sys.modules", {"re2": None}):
+            with self.assertRaisesRegex(ImportError, r"spanish-nlp\[re2\]"):
+                SpanishPreprocess(regex_engine="re2")
+        self.assertEqual(to_re2(re.escape("(T_T) :(")), r"\(T_T\) :\(")
+        self.assertIs(compile_pattern(r"(?<=\s)#", "re2"), re.compile(r"(?<=\s)#"))
+        # A long run of spaces used to take quadratic time
+        self.assertEqual(SpanishPreprocess()._normalize_punctuation_spelling_("a" + " " * 20_000 + "."), "a.")
+
+    @unittest.skipUnless(importlib.util.find_spec("re2"), "google-re2 is not installed")
+    def test_regex_engine_re2(self):
+        texts = [self.text, "Hola   :)  #MundoFeliz 1,5 (: ok\n\n  fin ...", "<b>Chao</b> 123 holaaa XD"]
+        for options in ({}, {"remove_emojis": False, "remove_emoticons": False}, {"remove_punctuation": False}):
+            expected = [SpanishPreprocess(**options).transform(text) for text in texts]
+            pp = SpanishPreprocess(regex_engine="re2", **options)
+            self.assertEqual([pp.transform(text) for text in texts], expected)
+        self.assertNotIsInstance(pp._patterns["url"], re.Pattern)
+
+    def test_profile(self):
+        self.assertEqual(self.preprocessor.profile_stats(), {})
+        with self.assertRaises(RuntimeError):
+            self.preprocessor.profile_report()
+
+        pp = SpanishPreprocess(profile=True, lemmatize=True)
+        texts = [self.text, "Hola #MundoFeliz :)"]
+        expected = [SpanishPreprocess(lemmatize=True).transform(text) for text in texts]
+        self.assertEqual([pp.transform(text) for text in texts], expected)
+        self.assertEqual(pp.transform_batch(texts, n_jobs=1), expected)
+
+        stats = pp.profile_stats()
+        self.assertEqual(list(stats), [step.name for step in pp._plan])
+        self.assertEqual(stats["_lower_"]["calls"], 4)
+        self.assertEqual(stats["_lemmatize_"]["calls"], 3)
+        self.assertEqual(stats["_lemmatize_"]["texts"], 4)
+        self.assertEqual(stats["_split_hashtags_"]["chars_in"], 2 * sum(map(len, texts)))
+        self.assertIn("_remove_url_", pp.profile_report())
+
+        pp.reset_profile()
+        self.assertEqual(pp.profile_stats()["_lower_"]["calls"], 0)
+
+    def test_step_gates(self):
+        pp = SpanishPreprocess(remove_emojis=False, remove_emoticons=False, profile=True)
+        texts = [self.text, "Hola mundo sin nada raro", "  dos  espacios\r\ny #tag ", "__ja__ siii :)"]
+        for text in texts:
+            expected = text
+            for step in pp._plan:
+                expected = step.func(expected)
+            transformed, trace = pp.transform_with_trace(text)
+            self.assertEqual(transformed, expected)
+            self.assertEqual(pp.transform(text), expected)
+            self.assertEqual([step.step for step in trace], [step.name for step in pp._plan])
+        self.assertEqual(pp.transform_batch(texts), [pp.transform(text) for text in texts])
+
+        skipped = {step.step for step in pp.transform_with_trace("Hola mundo sin nada raro")[1] if step.skipped}
+        self.assertEqual(
+            skipped,
+            {
+                "_split_hashtags_",
+                "_remove_url_",
+                "_text_to_emoticons_",
+                "_remove_multiples_spaces_",
+                "_normalize_breaklines_",
+                "_normalize_punctuation_spelling_",
+                "_remove_reduplications_",
+            },
+        )
+        self.assertGreater(pp.profile_stats()["_remove_url_"]["skipped"], 0)
+
+    def test_transform_stream(self):
+        texts = [self.text.replace("\n", " "), "Hola #MundoFeliz :)", "<b>Chao</b> 123"] * 3
+        expected = [self.preprocessor.transform(text) for text in texts]
+
+        stream = self.preprocessor.transform_stream(iter(texts), buffer_size=2)
+        self.assertEqual(list(stream), expected)
+
+        records = [{"id": i, "text": text} for i, text in enumerate(texts)]
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {fmt: os.path.join(tmp, f"corpus.{fmt}") for fmt in ("jsonl", "csv", "txt")}
+            with open(paths["jsonl"], "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+            with open(paths["csv"], "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=["id", "text"])
+                writer.writeheader()
+                writer.writerows(records)
+            with open(paths["txt"], "w", encoding="utf-8") as f:
+                f.write("\n".join(texts) + "\n")
+
+            jsonl = list(self.preprocessor.transform_stream(paths["jsonl"], buffer_size=4))
+            self.assertEqual([r["text"] for r in jsonl], expected)
+            self.assertEqual([r["id"] for r in jsonl], list(range(len(texts))))
+            csv_rows = list(self.preprocessor.transform_stream(paths["csv"], buffer_size=4))
+            self.assertEqual([r["text"] for r in csv_rows], expected)
+            lines = list(self.preprocessor.transform_stream(paths["txt"], buffer_size=4))
+            self.assertEqual(lines, expected)
+
+            json_path = os.path.join(tmp, "corpus.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(records, f, indent=2)
+            with self.assertRaisesRegex(ValueError, "format='jsonl'"):
+                list(self.preprocessor.transform_stream(json_path))
+            with self.assertRaisesRegex(ValueError, "not JSON Lines"):
+                list(self.preprocessor.transform_stream(json_path, format="jsonl"))
+            with open(json_path, "w", encoding="utf-8") as f:
+                f.write('["a", 1]\n{"text": "Hola #MundoFeliz"}\n')
+            self.assertEqual(
+                list(self.preprocessor.transform_stream(json_path, format="jsonl")),
+                [["a", 1], {"text": "hola mundo feliz"}],
+            )
+            os.replace(paths["jsonl"], json_path)
+            jsonl = list(self.preprocessor.transform_stream(json_path, format="jsonl"))
+            self.assertEqual([r["text"] for r in jsonl], expected)
+
     def test_transform_false(self):
         pp = SpanishPreprocess(**self.params)
         pp_text = pp.transform(self.text)